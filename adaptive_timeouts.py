@@ -0,0 +1,175 @@
+"""Wait budgets learned from how long each step actually took to become ready.
+
+Every adaptive wait records its outcome under a step name: the time it took
+when the element or signal showed up, or a miss when the budget ran out.
+The budget for the next wait is the ``BUDGET_PERCENTILE`` of the recent
+successful waits times ``BUDGET_MARGIN`` plus ``BUDGET_PADDING`` seconds,
+clamped between ``MIN_BUDGET`` and ``MAX_FACTOR`` times the step's default.
+Steps with fewer than ``MIN_SAMPLES`` recorded waits use their default; a
+step that has only ever missed (an optional popup, say) gets ``MIN_BUDGET``.
+When a step that rarely misses has just missed, the budget goes back up to
+at least the default, so one slow day does not turn into a string of
+failures.
+Inspect the learned budgets with::
+
+    python adaptive_timeouts.py report
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from selenium.common.exceptions import TimeoutException
+
+from tracing import percentile, set_attribute
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+TIMINGS_FILE = CACHE_DIR / "timings.json"
+RECENT_SAMPLES = 50
+MIN_SAMPLES = 8
+BUDGET_PERCENTILE = 0.95
+BUDGET_MARGIN = 1.5
+BUDGET_PADDING = 1.0
+MIN_BUDGET = 1.0
+MAX_FACTOR = 3.0
+# Up to this share of misses a step counts as normally ready.
+RARE_MISS_SHARE = 0.2
+
+# Use learned budgets; when False every wait uses its default (samples are still recorded).
+enabled = True
+
+
+class TimingStore:
+    """Recent wait outcomes and the default budget per step, persisted as JSON."""
+
+    def __init__(self, path: Path = TIMINGS_FILE) -> None:
+        self.path = path
+        self._steps: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._steps is None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                data = {}
+            steps = data.get("steps") if isinstance(data, dict) else None
+            self._steps = steps if isinstance(steps, dict) else {}
+        return self._steps
+
+    def steps(self) -> List[str]:
+        with self._lock:
+            return sorted(self._load())
+
+    def samples(self, step: str) -> List[List[Any]]:
+        """Return ``[elapsed, ready]`` pairs for ``step``, oldest first."""
+        with self._lock:
+            return list(self._load().get(step, {}).get("samples", []))
+
+    def default(self, step: str) -> Optional[float]:
+        """Return the default budget last used for ``step``."""
+        with self._lock:
+            return self._load().get(step, {}).get("default")
+
+    def record(self, step: str, elapsed: float, ready: bool, default: float) -> None:
+        with self._lock:
+            entry = self._load().setdefault(step, {"default": default, "samples": []})
+            entry["default"] = default
+            entry["samples"].append([round(elapsed, 3), ready])
+            del entry["samples"][:-RECENT_SAMPLES]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            temp_path.write_text(json.dumps({"steps": self._steps}), encoding="utf-8")
+            os.replace(temp_path, self.path)
+
+    def budget(self, step: str, default: float) -> float:
+        """Return the learned budget for ``step`` (``default`` without enough data)."""
+        samples = self.samples(step)
+        if len(samples) < MIN_SAMPLES:
+            return default
+        ready = [elapsed for elapsed, hit in samples if hit]
+        if not ready:
+            return min(MIN_BUDGET, default)
+        learned = percentile(ready, BUDGET_PERCENTILE) * BUDGET_MARGIN + BUDGET_PADDING
+        misses = len(samples) - len(ready)
+        if not samples[-1][1] and misses <= len(samples) * RARE_MISS_SHARE:
+            learned = max(learned, default)
+        return round(min(max(learned, MIN_BUDGET), default * MAX_FACTOR), 2)
+
+
+_STORE = TimingStore()
+
+
+def use_timing_file(path: Path) -> None:
+    """Record and read budgets from ``path`` instead of ``TIMINGS_FILE``."""
+    global _STORE
+    _STORE = TimingStore(path)
+
+
+def timeout_for(step: str, default: float) -> float:
+    """Return the budget to wait for ``step``."""
+    budget = _STORE.budget(step, default) if enabled else default
+    set_attribute("budget", budget)
+    return budget
+
+
+def record_wait(step: str, elapsed: float, ready: bool, default: float) -> None:
+    """Record how a wait for ``step`` ended."""
+    _STORE.record(step, elapsed, ready, default)
+
+
+@contextmanager
+def timed_wait(step: str, default: float) -> Iterator[float]:
+    """Yield the budget for a wait that raises ``TimeoutException`` when it runs out."""
+    budget = timeout_for(step, default)
+    started = time.monotonic()
+    try:
+        yield budget
+    except TimeoutException:
+        record_wait(step, time.monotonic() - started, False, default)
+        raise
+    record_wait(step, time.monotonic() - started, True, default)
+
+
+def format_report(store: TimingStore) -> str:
+    """Render the recorded outcomes, default and resulting budget per step."""
+    rows = []
+    for step in store.steps():
+        samples = store.samples(step)
+        ready = [elapsed for elapsed, hit in samples if hit]
+        default = store.default(step) or 0.0
+        rows.append(
+            (
+                step,
+                str(len(samples)),
+                str(len(samples) - len(ready)),
+                f"{percentile(ready, 0.5):.2f}" if ready else "-",
+                f"{percentile(ready, BUDGET_PERCENTILE):.2f}" if ready else "-",
+                f"{default:.2f}",
+                f"{store.budget(step, default):.2f}",
+            )
+        )
+    if not rows:
+        return "No waits recorded yet."
+    header = ("step", "waits", "misses", "p50", "p95", "default", "budget")
+    widths = [max(len(row[column]) for row in rows + [header]) for column in range(len(header))]
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(row, widths)) for row in [header] + rows)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect the adaptive wait budgets.")
+    parser.add_argument("--file", type=Path, default=TIMINGS_FILE, help="Timing store to read.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("report", help="Print recorded waits and budgets per step.")
+    args = parser.parse_args(argv)
+    print(format_report(TimingStore(args.file)))
+
+
+if __name__ == "__main__":
+    main()
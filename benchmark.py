@@ -0,0 +1,173 @@
+"""End-to-end benchmark of the posting flow against the local mock server.
+
+Each run starts a fresh history, points facebook_flow at ``mock_server`` for
+both the Facebook pages and the raw ``content.json`` feed, and drives the
+full flow (startup pipeline, login, Page switch, composer, upload, Next,
+Post) in headless Chrome. Wall-clock time per run and p50/p95 per traced
+phase are reported, so performance changes can be checked offline in CI.
+Histories, traces and every cache the flow writes are kept in the workdir::
+
+    python benchmark.py --runs 3 --posts 2 --ui-delay-ms 300
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import adaptive_timeouts
+import content_loader
+import facebook_flow
+import locators
+import posting_journal
+import tracing
+from image_cache import use_image_cache_dir
+from jobs import AccountRateLimiter, PostJob
+from mock_server import MockConfig, start_mock_server
+from vault import encrypt_payload
+
+BENCHMARK_KEY = "face-flow-benchmark"
+PAGE_METRIC_KEYS = ("load_ms", "resources", "transfer_kb", "rss_mb")
+
+
+def write_mock_cookies(destination: Path, domain: str) -> Path:
+    """Write an encrypted cookie bundle the mock server accepts as logged in."""
+    cookies = [
+        {"name": "c_user", "value": "100000000000001", "domain": domain, "path": "/"},
+        {"name": "xs", "value": "mock-session", "domain": domain, "path": "/", "httpOnly": True},
+    ]
+    payload = encrypt_payload(json.dumps(cookies).encode("utf-8"), BENCHMARK_KEY)
+    destination.write_text(json.dumps(payload), encoding="utf-8")
+    return destination
+
+
+def run_benchmark(
+    runs: int,
+    posts: int,
+    config: MockConfig,
+    workdir: Path,
+    lean: bool = False,
+) -> List[float]:
+    """Run the full flow ``runs`` times and return the wall-clock time of each."""
+    label = "lean" if lean else "full"
+    server = start_mock_server(config)
+    os.environ["DECRYPT_KEY"] = BENCHMARK_KEY
+    cookies_file = write_mock_cookies(workdir / "cookies.json.encrypted", "localhost")
+
+    facebook_flow.FACEBOOK_URL = f"{server.base_url}/"
+    facebook_flow.use_persistent_profile = False
+    facebook_flow.headless = True
+    facebook_flow.lean_mode = lean
+    tracing.TRACE_FILE = workdir / f"traces-{label}.jsonl"
+    # Keep every cache the flow writes inside the workdir: mock-server timings,
+    # locator winners, journals and downloads must not leak into production state.
+    adaptive_timeouts.use_timing_file(workdir / f"timings-{label}.json")
+    locators.LOCATOR_CACHE_FILE = workdir / f"locators-{label}.json"
+    posting_journal.JOURNAL_DIR = workdir / f"journal-{label}"
+    content_loader.CONTENT_CACHE_DIR = workdir / "content"
+    use_image_cache_dir(workdir / "images")
+
+    wall_times: List[float] = []
+    try:
+        for run in range(runs):
+            job = PostJob(
+                name="benchmark",
+                page_name=config.page_name,
+                cookies_file=cookies_file,
+                content_url=f"{server.base_url}/content.json",
+                history_file=workdir / f"history-{label}-{run}.jsonl",
+                max_posts=posts,
+            )
+            started = time.perf_counter()
+            try:
+                posted = facebook_flow.run_job(job, AccountRateLimiter(0))
+                error = None
+            except Exception as exc:
+                posted, error = 0, exc
+            elapsed = time.perf_counter() - started
+            wall_times.append(elapsed)
+            status = f"error: {error}" if error else f"posted {posted}"
+            print(f"Run {run + 1}/{runs}: {elapsed:.2f}s ({status})")
+    finally:
+        server.stop()
+
+    print(f"Mock server recorded {len(server.state.posts)} publish request(s).")
+    return wall_times
+
+
+def page_load_summary(records: Sequence[Dict[str, Any]]) -> Dict[str, float]:
+    """Return the median of each page metric recorded after the feed loaded."""
+    values: Dict[str, List[float]] = {}
+    for record in records:
+        attributes = record.get("attributes") or {}
+        if record.get("name") != "open_authenticated_session":
+            continue
+        for key in PAGE_METRIC_KEYS:
+            if isinstance(attributes.get(key), (int, float)):
+                values.setdefault(key, []).append(float(attributes[key]))
+    return {key: tracing.percentile(items, 0.5) for key, items in values.items()}
+
+
+def format_lean_comparison(full: Dict[str, float], lean: Dict[str, float]) -> str:
+    """Render the change in each page metric between the full and lean setups."""
+    lines = [f"{'metric'.ljust(14)}  {'full':>10}  {'lean':>10}  {'delta':>10}"]
+    for key in PAGE_METRIC_KEYS:
+        if key not in full or key not in lean:
+            continue
+        delta = lean[key] - full[key]
+        percent = f" ({delta / full[key] * 100:+.0f}%)" if full[key] else ""
+        lines.append(f"{key.ljust(14)}  {full[key]:10.1f}  {lean[key]:10.1f}  {delta:+10.1f}{percent}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark post_content against the local mock server.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--posts", type=int, default=1, help="Items posted per run (batch mode).")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Server latency per request.")
+    parser.add_argument("--ui-delay-ms", type=int, default=300, help="Client-side delay for UI transitions.")
+    parser.add_argument("--fail-publish-rate", type=float, default=0.0)
+    parser.add_argument("--workdir", type=Path, help="Keep traces and histories in this directory.")
+    parser.add_argument(
+        "--lean",
+        choices=("on", "off", "compare"),
+        default="off",
+        help="Lean browser mode (off by default, as in production); 'compare' runs both setups "
+        "and reports page-load and RSS deltas.",
+    )
+    args = parser.parse_args(argv)
+
+    config = MockConfig(
+        feed_items=max(5, args.posts),
+        latency_ms=args.latency_ms,
+        ui_delay_ms=args.ui_delay_ms,
+        fail_publish_rate=args.fail_publish_rate,
+    )
+
+    with tempfile.TemporaryDirectory(prefix="face_flow_bench_") as temp:
+        workdir = args.workdir or Path(temp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        modes = [False, True] if args.lean == "compare" else [args.lean == "on"]
+        page_loads: Dict[bool, Dict[str, float]] = {}
+        for lean in modes:
+            label = "lean" if lean else "full"
+            wall_times = run_benchmark(args.runs, args.posts, config, workdir, lean=lean)
+            records = tracing.load_records(tracing.TRACE_FILE)
+            page_loads[lean] = page_load_summary(records)
+            print()
+            print(f"[{label}] Wall clock: p50 {tracing.percentile(wall_times, 0.5):.2f}s, "
+                  f"p95 {tracing.percentile(wall_times, 0.95):.2f}s over {len(wall_times)} run(s)")
+            print(tracing.summarize(records))
+            print()
+
+        if len(modes) == 2:
+            print("Feed page load, full vs lean (p50):")
+            print(format_lean_comparison(page_loads[False], page_loads[True]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Browserless loader for the ``content.json`` feed.
+
+The raw file is fetched over plain HTTP(S) using pooled keep-alive
+connections. The last response is cached on disk together with its
+``ETag``/``Last-Modified`` validators, so an unchanged feed only costs a
+``304 Not Modified`` round trip. Large feeds are streamed to disk and parsed
+item by item instead of being buffered in memory.
+"""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from tracing import set_attribute, traced
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+CONTENT_CACHE_DIR = CACHE_DIR / "content"
+CONTENT_RAW_URL = (
+    "https://raw.githubusercontent.com/affnarayani/ninetynine_credits_legal_advice_app_content/main/content.json"
+)
+REQUEST_TIMEOUT = 15
+CHUNK_SIZE = 64 * 1024
+MAX_REDIRECTS = 5
+USER_AGENT = "face_flow-content-loader/1.0"
+
+
+class ConnectionPool:
+    """Keep one idle HTTP(S) connection per host for reuse across requests."""
+
+    def __init__(self, timeout: float = REQUEST_TIMEOUT) -> None:
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str, int], http.client.HTTPConnection] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme: str, host: str, port: Optional[int]) -> http.client.HTTPConnection:
+        """Return an idle connection for the host or open a new one."""
+        key = (scheme, host, port or (443 if scheme == "https" else 80))
+        with self._lock:
+            connection = self._idle.pop(key, None)
+        if connection is not None:
+            return connection
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, key[2], timeout=self.timeout)
+        return http.client.HTTPConnection(host, key[2], timeout=self.timeout)
+
+    def release(self, scheme: str, host: str, port: Optional[int], connection: http.client.HTTPConnection) -> None:
+        """Return a connection whose response has been fully read."""
+        key = (scheme, host, port or (443 if scheme == "https" else 80))
+        with self._lock:
+            previous = self._idle.pop(key, None)
+            self._idle[key] = connection
+        if previous is not None:
+            previous.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            connections = list(self._idle.values())
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+# Shared by the feed loader and the image cache.
+SHARED_POOL = ConnectionPool()
+
+
+def _cache_paths(cache_dir: Path) -> Tuple[Path, Path]:
+    return cache_dir / "content.json", cache_dir / "content.meta.json"
+
+
+def _load_meta(meta_path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def open_request(
+    pool: ConnectionPool, url: str, headers: Dict[str, str]
+) -> Tuple[http.client.HTTPResponse, http.client.HTTPConnection, Tuple[str, str, Optional[int]], str]:
+    """Issue a GET request following redirects; return the open response."""
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        key = (parts.scheme, parts.hostname or "", parts.port)
+        connection = pool.acquire(*key)
+        try:
+            connection.request("GET", target, headers={"Host": parts.netloc, **headers})
+            response = connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # A pooled keep-alive connection may have been closed by the server.
+            connection.close()
+            connection = pool.acquire(*key)
+            connection.request("GET", target, headers={"Host": parts.netloc, **headers})
+            response = connection.getresponse()
+
+        if response.status in (301, 302, 303, 307, 308):
+            location = response.getheader("Location")
+            response.read()
+            pool.release(*key, connection)
+            if not location:
+                break
+            url = urljoin(url, location)
+            continue
+        return response, connection, key, url
+
+    raise RuntimeError(f"Too many redirects while fetching {url}")
+
+
+def iter_body(response: http.client.HTTPResponse) -> Iterator[bytes]:
+    """Yield decoded body chunks, transparently inflating gzip responses."""
+    decoder = None
+    if (response.getheader("Content-Encoding") or "").lower() == "gzip":
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    while True:
+        chunk = response.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield decoder.decompress(chunk) if decoder else chunk
+    # read(amt) returns short at a dropped connection instead of raising.
+    if response.length:
+        raise http.client.IncompleteRead(b"", response.length)
+    if decoder:
+        tail = decoder.flush()
+        if tail:
+            yield tail
+
+
+def cache_dir_for(url: str) -> Path:
+    """Return the cache directory used for a given feed URL."""
+    return CONTENT_CACHE_DIR / hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+
+@traced()
+def fetch_content(
+    url: str = CONTENT_RAW_URL,
+    cache_dir: Optional[Path] = None,
+    pool: Optional[ConnectionPool] = None,
+) -> Tuple[Path, bool]:
+    """Fetch the feed into the cache and return ``(path, changed)``.
+
+    A conditional request is sent when a cached copy exists. On a ``304`` the
+    cached file is returned unchanged. If the network fails but a cached copy
+    is available, the cached copy is used instead.
+    """
+    pool = pool or SHARED_POOL
+    cache_dir = cache_dir or cache_dir_for(url)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    content_path, meta_path = _cache_paths(cache_dir)
+    meta = _load_meta(meta_path) if content_path.exists() else {}
+    if meta.get("url") != url:
+        meta = {}
+
+    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip", "Connection": "keep-alive"}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        response, connection, key, final_url = open_request(pool, url, headers)
+    except (http.client.HTTPException, OSError) as exc:
+        if meta:
+            print(f"Content fetch failed ({exc}); using cached copy.")
+            return content_path, False
+        raise RuntimeError(f"Unable to fetch content.json from {url}: {exc}") from exc
+
+    if response.status == 304:
+        response.read()
+        pool.release(*key, connection)
+        set_attribute("status", 304)
+        print("Content unchanged since last fetch (304).")
+        return content_path, False
+
+    if response.status != 200:
+        response.read()
+        pool.release(*key, connection)
+        if meta:
+            print(f"Content fetch returned HTTP {response.status}; using cached copy.")
+            return content_path, False
+        raise RuntimeError(f"Unable to fetch content.json from {url}: HTTP {response.status}")
+
+    partial_path: Optional[Path] = None
+    completed = False
+    try:
+        # A unique partial file keeps concurrent fetches of the same feed apart.
+        with tempfile.NamedTemporaryFile("wb", dir=cache_dir, suffix=".part", delete=False) as handle:
+            partial_path = Path(handle.name)
+            for chunk in iter_body(response):
+                handle.write(chunk)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(partial_path, content_path)
+        completed = True
+    except (http.client.HTTPException, OSError, zlib.error) as exc:
+        if meta:
+            print(f"Content download failed ({exc}); using cached copy.")
+            return content_path, False
+        raise RuntimeError(f"Unable to fetch content.json from {url}: {exc}") from exc
+    finally:
+        if partial_path is not None:
+            partial_path.unlink(missing_ok=True)
+        if not completed:
+            # The connection is mid-body; it cannot go back to the pool.
+            response.close()
+            connection.close()
+    pool.release(*key, connection)
+
+    new_meta = {
+        "url": url,
+        "final_url": final_url,
+        "etag": response.getheader("ETag"),
+        "last_modified": response.getheader("Last-Modified"),
+    }
+    meta_temp = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    meta_temp.write_text(json.dumps(new_meta, indent=2), encoding="utf-8")
+    os.replace(meta_temp, meta_path)
+    set_attribute("status", 200)
+    print(f"Saved content feed to {content_path}")
+    return content_path, True
+
+
+def iter_json_array(stream: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array without loading it whole."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+    # After "[": an element or "]"; after an element: "," or "]"; after ",": an element.
+    expect = "first"
+    eof = False
+
+    def _fill() -> bool:
+        nonlocal buffer, eof
+        if eof:
+            return False
+        # Grow reads with the buffer so a large item is re-scanned O(log n) times.
+        chunk = stream.read(max(chunk_size, len(buffer)))
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    while True:
+        buffer = buffer.lstrip()
+        if not started:
+            if not buffer:
+                if not _fill():
+                    raise ValueError("content.json is empty")
+                continue
+            if buffer[0] != "[":
+                raise ValueError("content.json must contain a list of objects")
+            buffer = buffer[1:]
+            started = True
+            continue
+
+        if not buffer:
+            if not _fill():
+                raise ValueError("content.json ended before the list was closed")
+            continue
+        if expect != "element" and buffer[0] == "]":
+            return
+        if expect == "separator":
+            if buffer[0] != ",":
+                raise json.JSONDecodeError("Expected ',' or ']' between list items", buffer, 0)
+            buffer = buffer[1:]
+            expect = "element"
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if _fill():
+                continue
+            raise
+        if end == len(buffer) and not eof:
+            # A number or literal at the buffer edge may continue in the next chunk.
+            if _fill():
+                continue
+        buffer = buffer[end:]
+        expect = "separator"
+        yield item
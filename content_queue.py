@@ -0,0 +1,129 @@
+"""Selection of pending feed items against a Page's post history.
+
+Everything here uses the standard library only, so ``post_content.py
+precheck`` can decide whether a post is due without importing Selenium or
+starting Chrome.
+"""
+from __future__ import annotations
+
+import re
+from html import unescape
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from content_loader import CONTENT_RAW_URL, fetch_content, iter_json_array
+from history_store import LEGACY_HISTORY_FILE, PostHistory
+from jobs import DEFAULT_JOB_NAME, PostJob
+from near_duplicates import NEAR_DUPLICATE_THRESHOLD, NearDuplicateIndex, Signature, index_path_for, similarity
+
+
+def open_history(job: PostJob) -> PostHistory:
+    """Open the job's history; only the default job migrates the legacy JSON file."""
+    legacy_file = LEGACY_HISTORY_FILE if job.name == DEFAULT_JOB_NAME else None
+    return PostHistory(Path(job.history_file), legacy_file)
+
+
+def load_content_items(content_file: Path) -> List[Dict[str, Any]]:
+    """Load content entries from the JSON file."""
+    if not content_file.exists():
+        raise FileNotFoundError(f"Content file not found: {content_file}")
+
+    with content_file.open("r", encoding="utf-8") as handle:
+        return [item for item in iter_json_array(handle) if isinstance(item, dict)]
+
+
+def strip_html_paragraphs(html_text: str) -> List[str]:
+    """Convert HTML paragraphs into plain-text lines."""
+    paragraphs = re.findall(r"<p>(.*?)</p>", html_text, flags=re.DOTALL | re.IGNORECASE)
+    if not paragraphs:
+        return [unescape(re.sub(r"<[^>]+>", "", html_text)).strip()] if html_text else []
+
+    lines = []
+    for paragraph in paragraphs:
+        clean = unescape(re.sub(r"<[^>]+>", "", paragraph)).strip()
+        if clean:
+            lines.append(clean)
+    return lines
+
+
+def plain_text(description_html: str) -> str:
+    """Return the text the near-duplicate index compares."""
+    return "\n".join(strip_html_paragraphs(description_html))
+
+
+def open_near_duplicate_index(history: PostHistory, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> NearDuplicateIndex:
+    """Load the index stored next to the history and bring it up to date with it."""
+    path = index_path_for(history.log_file)
+    index = NearDuplicateIndex.load(path, threshold)
+    digests = set()
+    for entry in history.entries():
+        digests.add(entry["digest"])
+        if entry["digest"] not in index:
+            signature = index.signature(plain_text(entry.get("description", "")))
+            if signature is not None:
+                index.add(entry["digest"], signature)
+    index.retain(digests)
+    if index.dirty and history.log_file.exists():
+        index.save(path)
+    return index
+
+
+def find_pending_items(
+    content_items: List[Dict[str, Any]],
+    history: PostHistory,
+    limit: int,
+    near_index: Optional[NearDuplicateIndex] = None,
+) -> List[Dict[str, Any]]:
+    """Return up to ``limit`` content items whose descriptions have not been used.
+
+    With ``near_index``, items that are near-duplicates of a posted entry or
+    of an item already selected are skipped as well.
+    """
+    pending: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    selected: List[Signature] = []
+    for item in content_items:
+        if len(pending) >= limit:
+            break
+        description = item.get("description", "").strip()
+        if not description or description in seen or history.has_posted(description):
+            continue
+        seen.add(description)
+        if near_index is not None:
+            signature = near_index.signature(plain_text(description))
+            if signature is not None:
+                title = item.get("title", "").strip()
+                match = near_index.query(signature)
+                if match is not None:
+                    print(f"Skipping '{title}': near-duplicate of a posted item (similarity {match[1]:.2f}).")
+                    continue
+                if any(similarity(signature, other) >= near_index.threshold for other in selected):
+                    print(f"Skipping '{title}': near-duplicate of another pending item.")
+                    continue
+                selected.append(signature)
+        pending.append(item)
+    return pending
+
+
+def find_next_content_item(
+    content_items: List[Dict[str, Any]], history: PostHistory
+) -> Optional[Dict[str, Any]]:
+    """Return the first content item whose description has not been used."""
+    pending = find_pending_items(content_items, history, 1)
+    return pending[0] if pending else None
+
+
+def select_candidates(
+    history: PostHistory,
+    limit: int,
+    content_url: str = CONTENT_RAW_URL,
+    similarity_threshold: Optional[float] = NEAR_DUPLICATE_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Fetch the feed and return up to ``limit`` items that have not been posted yet.
+
+    A ``similarity_threshold`` of None disables near-duplicate detection.
+    """
+    content_file, _ = fetch_content(content_url)
+    content_items = load_content_items(content_file)
+    near_index = open_near_duplicate_index(history, similarity_threshold) if similarity_threshold else None
+    return find_pending_items(content_items, history, limit, near_index)
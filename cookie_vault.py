@@ -0,0 +1,268 @@
+"""Offline checks of an encrypted cookie bundle before a browser is started.
+
+A bundle is usable when it decrypts, holds the ``c_user`` and ``xs`` session
+cookies and neither expires within ``MIN_REMAINING_LIFETIME``. A bundle that
+expires within ``RENEWAL_WARNING`` is still used, with a warning to log in
+again soon. Only the stored expiry dates are checked: a session Facebook
+revoked server-side still shows up as a logged-out page load.
+
+Facebook rotates and extends the session cookies while they are used, so
+after a successful post the browser's cookie jar is merged back into the
+bundle with ``refresh_cookie_file``. The bundle is rewritten only when a
+cookie value changed or the session expiry moved by at least
+``EXPIRY_RESOLUTION``; cookies that change on every page view are ignored
+for that comparison. Check a bundle without posting with::
+
+    python cookie_vault.py status [--file cookies.json.encrypted]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from cryptography.exceptions import InvalidTag
+
+from tracing import set_attribute
+from vault import decrypt_payload, get_password, write_envelope
+
+COOKIES_FILE = Path(__file__).resolve().parent / "cookies.json.encrypted"
+SESSION_COOKIES = ("c_user", "xs")
+MIN_REMAINING_LIFETIME = 6 * 3600.0
+RENEWAL_WARNING = 14 * 24 * 3600.0
+EXPIRY_RESOLUTION = 24 * 3600.0
+# Cookies rewritten on every page view; a change in them alone is not a refresh.
+VOLATILE_COOKIES = frozenset({"presence", "wd", "dpr"})
+
+_refresh_locks: Dict[str, threading.Lock] = {}
+_refresh_locks_guard = threading.Lock()
+
+
+class CookieVaultError(RuntimeError):
+    """The cookie bundle cannot log in; carries the offending status."""
+
+    def __init__(self, status: "CookieStatus") -> None:
+        super().__init__(status.describe())
+        self.status = status
+
+
+@dataclass
+class CookieStatus:
+    """Outcome of checking one cookie bundle."""
+
+    path: Path
+    # "ok", "expiring", "expired", "incomplete" or "unreadable".
+    state: str
+    detail: str = ""
+    # Earliest expiry (epoch seconds) of the session cookies; None for browser-session cookies.
+    expires_at: Optional[float] = None
+    cookies: List[Dict[str, Any]] = field(default_factory=list, repr=False)
+
+    @property
+    def usable(self) -> bool:
+        return self.state in ("ok", "expiring")
+
+    def remaining(self, now: Optional[float] = None) -> Optional[float]:
+        """Return the seconds left until the first session cookie expires."""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - (time.time() if now is None else now)
+
+    def describe(self) -> str:
+        text = f"{self.path.name}: {self.state}"
+        if self.detail:
+            text += f" ({self.detail})"
+        if self.expires_at is not None:
+            text += f", session expires {datetime.fromtimestamp(self.expires_at):%Y-%m-%d %H:%M}"
+        return text
+
+
+def read_cookies(path: Path, password: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Decrypt and parse the cookie list stored at ``path``."""
+    if not path.exists():
+        raise FileNotFoundError(f"Cookies file not found: {path}")
+
+    password = password or get_password()
+
+    with path.open("r", encoding="utf-8") as cookie_file:
+        payload = json.load(cookie_file)
+
+    if not isinstance(payload, dict):
+        raise ValueError("Encrypted cookies file must contain a JSON object payload")
+
+    plaintext = decrypt_payload(payload, password)
+    cookies = json.loads(plaintext.decode("utf-8"))
+
+    if not isinstance(cookies, list):
+        raise ValueError("Cookies file must contain a list of cookie objects")
+
+    return cookies
+
+
+def session_expiry(cookies: Sequence[Dict[str, Any]]) -> Optional[float]:
+    """Return the earliest expiry among the session cookies that have one."""
+    expiries = [
+        float(cookie["expiry"])
+        for cookie in cookies
+        if cookie.get("name") in SESSION_COOKIES and cookie.get("expiry") is not None
+    ]
+    return min(expiries) if expiries else None
+
+
+def inspect_cookies(
+    cookies: List[Dict[str, Any]],
+    path: Path,
+    now: Optional[float] = None,
+    min_lifetime: float = MIN_REMAINING_LIFETIME,
+) -> CookieStatus:
+    """Classify decrypted ``cookies`` by session cookie presence and lifetime."""
+    now = time.time() if now is None else now
+    missing = [name for name in SESSION_COOKIES if not any(cookie.get("name") == name for cookie in cookies)]
+    if missing:
+        return CookieStatus(path, "incomplete", "missing " + ", ".join(missing), cookies=cookies)
+
+    status = CookieStatus(path, "ok", expires_at=session_expiry(cookies), cookies=cookies)
+    remaining = status.remaining(now)
+    if remaining is None:
+        return status
+    if remaining <= 0:
+        status.state, status.detail = "expired", f"{-remaining / 86400:.1f} days ago"
+    elif remaining < min_lifetime:
+        status.state, status.detail = "expired", f"only {remaining / 3600:.1f} hours left"
+    elif remaining < RENEWAL_WARNING:
+        status.state, status.detail = "expiring", f"{remaining / 86400:.1f} days left"
+    return status
+
+
+def check_cookie_file(
+    path: Path,
+    password: Optional[str] = None,
+    now: Optional[float] = None,
+    min_lifetime: float = MIN_REMAINING_LIFETIME,
+) -> CookieStatus:
+    """Decrypt ``path`` and check it without touching the network."""
+    password = password or get_password()
+    try:
+        cookies = read_cookies(path, password)
+    except FileNotFoundError:
+        return CookieStatus(path, "unreadable", "file not found")
+    except InvalidTag:
+        return CookieStatus(path, "unreadable", "cannot be decrypted with DECRYPT_KEY")
+    except ValueError as exc:
+        return CookieStatus(path, "unreadable", str(exc))
+    return inspect_cookies(cookies, path, now, min_lifetime)
+
+
+def load_session_cookies(path: Path, password: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return the cookies at ``path``, raising ``CookieVaultError`` when they cannot log in."""
+    status = check_cookie_file(path, password)
+    set_attribute("cookies", status.state)
+    remaining = status.remaining()
+    if remaining is not None:
+        set_attribute("cookie_days_left", round(remaining / 86400, 1))
+    if not status.usable:
+        raise CookieVaultError(status)
+    if status.state == "expiring":
+        print(f"Warning: {status.describe()}. Run get_cookie.py to log in again soon.")
+    return status.cookies
+
+
+def _cookie_key(cookie: Dict[str, Any]) -> Tuple[Any, Any, Any]:
+    return cookie.get("name"), cookie.get("domain"), cookie.get("path", "/")
+
+
+def merge_cookies(
+    stored: Sequence[Dict[str, Any]], live: Sequence[Dict[str, Any]], now: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Return ``stored`` updated with ``live``, dropping stored cookies that have expired."""
+    now = time.time() if now is None else now
+    merged = {
+        _cookie_key(cookie): cookie
+        for cookie in stored
+        if cookie.get("expiry") is None or float(cookie["expiry"]) > now
+    }
+    merged.update((_cookie_key(cookie), cookie) for cookie in live)
+    return list(merged.values())
+
+
+def cookies_changed(stored: Sequence[Dict[str, Any]], merged: Sequence[Dict[str, Any]]) -> bool:
+    """Return True when ``merged`` is worth writing over ``stored``."""
+
+    def values(cookies: Sequence[Dict[str, Any]]) -> Dict[Tuple[Any, Any, Any], Any]:
+        return {
+            _cookie_key(cookie): cookie.get("value")
+            for cookie in cookies
+            if cookie.get("name") not in VOLATILE_COOKIES
+        }
+
+    if values(stored) != values(merged):
+        return True
+    before, after = session_expiry(stored), session_expiry(merged)
+    if before is None or after is None:
+        return before != after
+    return abs(after - before) >= EXPIRY_RESOLUTION
+
+
+def _refresh_lock(path: Path) -> threading.Lock:
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(str(path.resolve()), threading.Lock())
+
+
+def refresh_cookie_file(
+    path: Path, live: Sequence[Dict[str, Any]], password: Optional[str] = None
+) -> Optional[CookieStatus]:
+    """Merge the browser's ``live`` cookies into the bundle at ``path``.
+
+    Returns the status of the rewritten bundle, or None when nothing worth
+    writing changed. Raises ``ValueError`` when ``live`` has no session, so a
+    logged-out jar never replaces working cookies.
+    """
+    missing = [name for name in SESSION_COOKIES if not any(cookie.get("name") == name for cookie in live)]
+    if missing:
+        raise ValueError("browser cookie jar is missing " + ", ".join(missing))
+
+    password = password or get_password()
+    # Jobs sharing an account share the bundle; merge into the latest copy.
+    with _refresh_lock(path):
+        try:
+            stored = read_cookies(path, password)
+        except (FileNotFoundError, InvalidTag, ValueError):
+            stored = []
+        merged = merge_cookies(stored, live)
+        if not cookies_changed(stored, merged):
+            return None
+        write_envelope(path, json.dumps(merged).encode("utf-8"), password)
+    return inspect_cookies(merged, path)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Check encrypted cookie bundles offline.")
+    parser.add_argument(
+        "--file",
+        type=Path,
+        action="append",
+        help="Cookie bundle to check; repeatable (default: cookies.json.encrypted).",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status", help="Print the state of each bundle; exit 1 if any is unusable.")
+    args = parser.parse_args(argv)
+
+    try:
+        password = get_password()
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        sys.exit(1)
+    statuses = [check_cookie_file(path, password) for path in args.file or [COOKIES_FILE]]
+    for status in statuses:
+        print(status.describe())
+    sys.exit(0 if all(status.usable for status in statuses) else 1)
+
+
+if __name__ == "__main__":
+    main()
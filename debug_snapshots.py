@@ -0,0 +1,129 @@
+"""Opt-in, compressed DOM snapshots for debugging failed runs.
+
+Serializing Facebook's DOM over the WebDriver wire is expensive, so nothing
+is captured on the happy path. A snapshot is taken when a step fails, or at
+fixed checkpoints when ``enabled`` is set (``post_content.py
+--debug-snapshots``). Each snapshot is one gzip-compressed JSON document
+holding the page HTML, URL, title and the current trace context; only the
+newest ``SNAPSHOT_RING_SIZE`` are kept. Inspect them with::
+
+    python debug_snapshots.py list
+    python debug_snapshots.py extract 1 --out failure.html
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from tracing import current_context
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+SNAPSHOT_DIR = CACHE_DIR / "snapshots"
+SNAPSHOT_RING_SIZE = 10
+SNAPSHOT_SUFFIX = ".json.gz"
+
+# Capture at checkpoints as well as on failure.
+enabled = False
+
+_ring_lock = threading.Lock()
+
+
+def list_snapshots(snapshot_dir: Path = SNAPSHOT_DIR) -> List[Path]:
+    """Return stored snapshots, newest first."""
+    if not snapshot_dir.exists():
+        return []
+    return sorted(snapshot_dir.glob(f"*{SNAPSHOT_SUFFIX}"), reverse=True)
+
+
+def capture(
+    driver: Any,
+    label: str,
+    reason: str = "failure",
+    snapshot_dir: Path = SNAPSHOT_DIR,
+    keep: int = SNAPSHOT_RING_SIZE,
+) -> Optional[Path]:
+    """Store a compressed snapshot of the current page; never raises."""
+    try:
+        document = {
+            "label": label,
+            "reason": reason,
+            "captured_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "url": driver.current_url,
+            "title": driver.title,
+            "trace": current_context(),
+            "html": driver.page_source,
+        }
+    except Exception as exc:  # The browser may already be gone.
+        print(f"Unable to capture DOM snapshot '{label}': {exc.__class__.__name__}")
+        return None
+
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    now = time.time_ns()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now // 1_000_000_000))
+    name = f"{stamp}-{now % 1_000_000_000:09d}-{label}{SNAPSHOT_SUFFIX}"
+    destination = snapshot_dir / name
+    temp_path = destination.with_name(f"{name}.{os.getpid()}.tmp")
+    with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as handle:
+        json.dump(document, handle, ensure_ascii=False)
+    os.replace(temp_path, destination)
+
+    with _ring_lock:
+        for stale in list_snapshots(snapshot_dir)[keep:]:
+            stale.unlink(missing_ok=True)
+    print(f"Saved DOM snapshot ({reason}) to {destination}")
+    return destination
+
+
+def checkpoint(driver: Any, label: str) -> Optional[Path]:
+    """Capture a snapshot only when debug capture is enabled."""
+    if not enabled:
+        return None
+    return capture(driver, label, reason="checkpoint")
+
+
+def load_snapshot(path: Path) -> Dict[str, Any]:
+    """Read a stored snapshot back into a dictionary."""
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect stored DOM snapshots.")
+    parser.add_argument("--dir", type=Path, default=SNAPSHOT_DIR, help="Snapshot directory.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="List snapshots, newest first.")
+    extract = subparsers.add_parser("extract", help="Write the HTML of one snapshot.")
+    extract.add_argument("index", type=int, help="1-based position in 'list'.")
+    extract.add_argument("--out", type=Path, help="Output file (default: stdout).")
+    args = parser.parse_args(argv)
+
+    snapshots = list_snapshots(args.dir)
+    if args.command == "list":
+        for position, path in enumerate(snapshots, start=1):
+            document = load_snapshot(path)
+            trace = document.get("trace") or {}
+            print(
+                f"{position:3d}  {document.get('captured_at')}  {document.get('reason'):10s}  "
+                f"{document.get('label')}  span={trace.get('span')}  {document.get('url')}"
+            )
+        return
+
+    if not 1 <= args.index <= len(snapshots):
+        parser.error(f"index must be between 1 and {len(snapshots)}")
+    document = load_snapshot(snapshots[args.index - 1])
+    if args.out:
+        args.out.write_text(document["html"], encoding="utf-8")
+        print(f"Wrote {args.out}")
+    else:
+        print(document["html"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cached, offline-capable chromedriver resolution.
+
+``ChromeDriverManager().install()`` performs version discovery (and possibly
+network calls) on every start. This module records the resolved driver path
+together with the installed Chrome version in a small manifest and reuses it
+until the browser's major version changes, so a warm start only costs a
+local version probe. Drivers are downloaded into ``.cache`` so the binary
+survives on runners that restore that directory.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.driver_cache import DriverCacheManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+DRIVER_MANIFEST = CACHE_DIR / "chromedriver.json"
+
+# Worker threads resolve concurrently; one resolves, the others reuse its manifest.
+_manifest_lock = threading.Lock()
+
+
+def detect_chrome_version() -> Optional[str]:
+    """Return the locally installed Chrome version without touching the network."""
+    try:
+        return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception:
+        return None
+
+
+def _major(version: Optional[str]) -> Optional[str]:
+    return version.split(".", 1)[0] if version else None
+
+
+def _load_manifest(manifest: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads(manifest.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _store_manifest(manifest: Path, data: Dict[str, Any]) -> None:
+    manifest.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = manifest.with_name(f"{manifest.name}.{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    os.replace(temp_path, manifest)
+
+
+def resolve_chromedriver(manifest: Path = DRIVER_MANIFEST) -> str:
+    """Return a chromedriver path matching the installed Chrome.
+
+    The cached path is reused when its recorded Chrome major version matches
+    the installed browser, or when the browser version cannot be detected
+    (fully offline). Otherwise webdriver-manager resolves a new driver and the
+    manifest is updated.
+    """
+    with _manifest_lock:
+        return _resolve(manifest)
+
+
+def _resolve(manifest: Path) -> str:
+    started = time.perf_counter()
+    chrome_version = detect_chrome_version()
+    cached = _load_manifest(manifest)
+    cached_path = cached.get("driver_path")
+
+    if cached_path and os.path.exists(cached_path):
+        if chrome_version is None or _major(chrome_version) == _major(cached.get("chrome_version")):
+            elapsed = time.perf_counter() - started
+            print(f"Resolved chromedriver from manifest in {elapsed:.3f}s (Chrome {chrome_version or 'unknown'}).")
+            return cached_path
+
+    cache_manager = DriverCacheManager(root_dir=str(CACHE_DIR))
+    driver_path = ChromeDriverManager(cache_manager=cache_manager).install()
+
+    _store_manifest(
+        manifest,
+        {
+            "chrome_version": chrome_version,
+            "driver_path": driver_path,
+            "resolved_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+    )
+    elapsed = time.perf_counter() - started
+    print(f"Resolved chromedriver via webdriver-manager in {elapsed:.3f}s (Chrome {chrome_version or 'unknown'}).")
+    return driver_path
+
+
+if __name__ == "__main__":
+    print(resolve_chromedriver())
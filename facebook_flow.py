@@ -0,0 +1,1093 @@
+"""Browser side of a posting run: log in, act as the Page, post and confirm.
+
+``run_job`` checks the encrypted cookie bundle, then starts Chrome (with the
+stored profile when there is one) while the feed is read and images are
+prefetched (``run_startup``). It reaches the logged-in feed, switches the
+session to the job's Page and posts each candidate through the composer:
+text, image, "Next", "Post". A post is confirmed from Facebook's publish
+response (``publish_confirmation``), or from the composer closing when that
+response cannot be observed, and then recorded in the history. Every phase
+is written to the posting journal first, so a crashed run never posts the
+same item twice. After a successful run the refreshed session cookies and
+the browser profile are stored again.
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import nullcontext
+from html import escape
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    InvalidArgumentException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from adaptive_timeouts import record_wait, timed_wait, timeout_for
+from content_queue import open_history, select_candidates, strip_html_paragraphs
+from cookie_vault import load_session_cookies, refresh_cookie_file
+from debug_snapshots import capture, checkpoint
+from driver_resolver import resolve_chromedriver
+from image_cache import fetch_image
+from history_store import PostHistory
+from jobs import AccountRateLimiter, MemoryWatchdog, PostJob
+from lean_browser import (
+    COMPOSER_BLOCKED_CATEGORIES,
+    LEAN_BLOCKED_CATEGORIES,
+    LEAN_CHROME_FLAGS,
+    PERFORMANCE_LOG_CAPABILITY,
+    page_metrics,
+    set_resource_blocking,
+)
+from locators import race_locators
+from posting_journal import PostingJournal
+from publish_confirmation import PublishMonitor
+from readiness import (
+    install_network_tracker,
+    wait_for_button_enabled,
+    wait_for_dialog_closed,
+    wait_for_file_input,
+    wait_for_menu,
+    wait_for_network_idle,
+    wait_for_upload_complete,
+)
+from retry_policy import TRANSIENT_ERRORS, retry_step
+from session_profile import (
+    create_profile_dir,
+    discard_profile,
+    profile_archive_path,
+    restore_profile,
+    save_profile,
+)
+from startup import PipelineError, Stage, format_timing_report, run_pipeline
+from tracing import increment_attribute, instrument_driver, set_attribute, span, trace_run, traced
+from vault import get_password
+
+# Toggle this flag to run the browser in headless mode when desired.
+headless = True
+# Reuse an encrypted Chrome profile between runs so the session is already
+# authenticated on the first page load.
+use_persistent_profile = True
+# Block feed media, fonts and trackers and start Chrome with lean flags.
+# Off by default until ``benchmark.py --lean compare`` shows it is safe.
+lean_mode = False
+# Insert composer text in bulk (CDP / paste) instead of one key event per
+# character. Keystroke entry is still used when bulk entry cannot be verified.
+fast_text_entry = True
+
+FACEBOOK_URL = "https://www.facebook.com/"
+CREATE_POST_TRIGGER_XPATH = (
+    "/html/body/div[1]/div/div[1]/div/div[3]/div/div/div[1]/div[1]/div/div[2]/div/div/div/div[2]/div/div[2]/div/div/div/div[1]/div/div[1]/span"
+)
+# This XPath is for the media upload button within the post creation pop-up.
+MEDIA_UPLOAD_XPATH = (
+    "/html/body/div[1]/div/div[1]/div/div[4]/div/div/div[1]/div/div[2]/div/div/div/form/div/div[1]/div/div/div/div[2]/div[1]/div[3]/div[1]/div[1]/div/div/div"
+)
+LEXICAL_EDITOR_LOCATORS: Tuple[Tuple[By, str], ...] = (
+    (By.CSS_SELECTOR, "[data-lexical-editor] [data-lexical-text='true']"),
+    (By.CSS_SELECTOR, "div[role='dialog'] div[role='textbox'][contenteditable='true']"),
+    (By.CSS_SELECTOR, "div[role='dialog'] div[role='textbox']"),
+)
+NEXT_BUTTON_XPATH = (
+    "/html/body/div[1]/div/div[1]/div/div[4]/div/div/div[1]/div/div[2]/div/div/div/form/div/div[1]/div/div/div/div[3]/div[3]/div/div/div/div[1]/div/span/span"
+)
+POST_BUTTON_XPATH = "//div[@role='button']//span[normalize-space(text())='Post']"
+# Facebook asks for confirmation before discarding a draft.
+DISCARD_BUTTON_XPATH = (
+    "//div[@role='dialog']//div[@role='button'][.//span[normalize-space(text())='Leave' "
+    "or normalize-space(text())='Discard']]"
+)
+PAGE_HEADER_XPATH = (
+    "/html/body/div[1]/div/div[1]/div/div[3]/div/div/div[1]/div[1]/div/div[1]/div/div/div[1]/div/div/div[1]/div[1]/ul/li[1]/div/div/div/a/div[1]/div/div[2]/div/div/div/span/span"
+)
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36"
+ALLOWED_COOKIE_KEYS = {
+    "domain",
+    "expiry",
+    "httpOnly",
+    "name",
+    "path",
+    "sameSite",
+    "secure",
+    "value",
+}
+
+# Reduce webdriver-manager logging noise.
+os.environ.setdefault("WDM_LOG_LEVEL", "0")
+
+
+@traced()
+def load_cookies(file_path: Path) -> List[Dict[str, Any]]:
+    """Load the encrypted cookies, raising ``CookieVaultError`` when they cannot log in."""
+    return load_session_cookies(file_path)
+
+
+@traced()
+def harvest_cookies(driver: webdriver.Chrome, job: PostJob) -> None:
+    """Write the session cookies Facebook rotated during the run back to the job's bundle."""
+    try:
+        status = refresh_cookie_file(Path(job.cookies_file), driver.get_cookies())
+    except (WebDriverException, OSError, ValueError) as exc:
+        print(f"[{job.name}] Cookies not refreshed: {exc}")
+        return
+    if status is None:
+        print(f"[{job.name}] Stored cookies are up to date.")
+        return
+    set_attribute("cookies_refreshed", True)
+    if status.expires_at is not None:
+        set_attribute("cookie_expiry_horizon", int(status.expires_at))
+    print(f"[{job.name}] Refreshed cookies: {status.describe()}")
+
+
+def sanitize_cookie(cookie: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a cookie dictionary compatible with Selenium."""
+    sanitized = {key: cookie[key] for key in ALLOWED_COOKIE_KEYS if key in cookie}
+
+    if "expiry" in sanitized:
+        sanitized["expiry"] = int(sanitized["expiry"])
+
+    return sanitized
+
+
+@traced()
+def create_driver(
+    user_data_dir: Optional[Path] = None, js_heap_limit_mb: Optional[int] = None
+) -> webdriver.Chrome:
+    """Create and configure the Chrome WebDriver instance."""
+    options = Options()
+
+    if js_heap_limit_mb:
+        options.add_argument(f"--js-flags=--max-old-space-size={js_heap_limit_mb}")
+
+    if user_data_dir is not None:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+        # Keep cookie encryption independent of the host keyring so the
+        # profile can be restored on another runner.
+        options.add_argument("--password-store=basic")
+
+    options.add_argument(f"user-agent={USER_AGENT}")
+
+    if headless:
+        options.add_argument("--headless=new")
+        # Explicit window size ensures consistent layout when headless.
+        options.add_argument("--window-size=1920,1080")
+
+    prefs = {
+        "profile.default_content_setting_values.notifications": 2,
+    }
+    options.add_experimental_option("prefs", prefs)
+    # Network events for confirming the publish request.
+    options.set_capability("goog:loggingPrefs", PERFORMANCE_LOG_CAPABILITY)
+    options.add_argument("--disable-notifications")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-webgl")
+    options.add_argument("--enable-unsafe-swiftshader")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--log-level=3")
+    if lean_mode:
+        for flag in LEAN_CHROME_FLAGS:
+            options.add_argument(flag)
+
+    started = time.perf_counter()
+    service = Service(resolve_chromedriver(), log_path=os.devnull)
+    driver = instrument_driver(webdriver.Chrome(service=service, options=options))
+    print(f"Chrome driver ready in {time.perf_counter() - started:.2f}s.")
+
+    if not headless:
+        driver.maximize_window()
+
+    if lean_mode:
+        set_resource_blocking(driver, LEAN_BLOCKED_CATEGORIES)
+
+    return driver
+
+
+def to_cdp_cookie(cookie: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Selenium-style cookie into a CDP ``Network.CookieParam``."""
+    sanitized = sanitize_cookie(cookie)
+    cdp_cookie = {
+        "name": sanitized["name"],
+        "value": sanitized["value"],
+        "domain": sanitized["domain"],
+        "path": sanitized.get("path", "/"),
+        "secure": bool(sanitized.get("secure", False)),
+        "httpOnly": bool(sanitized.get("httpOnly", False)),
+    }
+    if sanitized.get("sameSite") in {"Strict", "Lax", "None"}:
+        cdp_cookie["sameSite"] = sanitized["sameSite"]
+    if "expiry" in sanitized:
+        cdp_cookie["expires"] = sanitized["expiry"]
+    return cdp_cookie
+
+
+@traced()
+def apply_cookies(driver: webdriver.Chrome, cookies: List[Dict[str, Any]]) -> None:
+    """Apply cookies to the browser in one CDP call; works before any navigation."""
+    usable = [
+        cookie for cookie in cookies
+        if {"domain", "name", "value"}.issubset(sanitize_cookie(cookie).keys())
+    ]
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": [to_cdp_cookie(c) for c in usable]})
+        return
+    except WebDriverException as exc:
+        print(f"Bulk cookie injection failed ({exc}); falling back to per-cookie WebDriver calls.")
+
+    # WebDriver can only set cookies for the current document's domain.
+    if not driver.current_url.startswith(FACEBOOK_URL):
+        driver.get(FACEBOOK_URL)
+    driver.delete_all_cookies()
+    for cookie in usable:
+        driver.add_cookie(sanitize_cookie(cookie))
+
+
+def is_session_authenticated(driver: webdriver.Chrome) -> bool:
+    """Return True when the loaded page belongs to a logged-in session."""
+    if driver.get_cookie("c_user") is None:
+        return False
+    return not driver.find_elements(By.CSS_SELECTOR, "form[data-testid='royal_login_form'], input#email")
+
+
+@traced()
+def launch_browser(
+    profile_archive: Optional[Path] = None, js_heap_limit_mb: Optional[int] = None
+) -> Tuple[webdriver.Chrome, Optional[Path], bool]:
+    """Start Chrome, restoring the encrypted profile when enabled.
+
+    Returns the driver, the user-data-dir in use (if any) and whether that
+    directory came from a stored profile.
+    """
+    if not use_persistent_profile:
+        return create_driver(js_heap_limit_mb=js_heap_limit_mb), None, False
+
+    profile_dir = restore_profile(get_password(), profile_archive or profile_archive_path())
+    restored = profile_dir is not None
+    if profile_dir is None:
+        profile_dir = create_profile_dir()
+    try:
+        return create_driver(profile_dir, js_heap_limit_mb), profile_dir, restored
+    except Exception:
+        discard_profile(profile_dir)
+        raise
+
+
+def _close_browser(browser: Tuple[webdriver.Chrome, Optional[Path], bool]) -> None:
+    driver, profile_dir, _ = browser
+    driver.quit()
+    discard_profile(profile_dir)
+
+
+@traced()
+def open_authenticated_session(
+    driver: webdriver.Chrome, cookies: List[Dict[str, Any]], profile_restored: bool
+) -> None:
+    """Reach the logged-in Facebook feed with a single page load when possible."""
+    if profile_restored:
+        print("Navigating to Facebook with stored profile...")
+        driver.get(FACEBOOK_URL)
+        if is_session_authenticated(driver):
+            record_page_metrics(driver)
+            return
+        print("Stored profile session is stale; applying cookies from the cookies file...")
+        apply_cookies(driver, cookies)
+        driver.refresh()
+        record_page_metrics(driver)
+        return
+
+    print("Applying cookies before first navigation...")
+    apply_cookies(driver, cookies)
+    print("Navigating to Facebook...")
+    driver.get(FACEBOOK_URL)
+    record_page_metrics(driver)
+
+
+def record_page_metrics(driver: webdriver.Chrome) -> None:
+    """Attach page-load timing and browser memory to the current span."""
+    metrics = page_metrics(driver)
+    for key, value in metrics.items():
+        set_attribute(key, value)
+    set_attribute("lean", lean_mode)
+    print(
+        f"Feed loaded in {metrics.get('load_ms')} ms, {metrics.get('resources')} resources "
+        f"({metrics.get('transfer_kb')} KB), browser RSS {metrics.get('rss_mb')} MB."
+    )
+
+
+
+@traced()
+def dismiss_notification_popup(driver: webdriver.Chrome, timeout: int = 10) -> None:
+    """Dismiss the browser notification popup if it appears."""
+    try:
+        with timed_wait("notification_popup", timeout) as budget:
+            popup = WebDriverWait(driver, budget).until(
+                EC.presence_of_element_located(
+                    (
+                        By.XPATH,
+                        '//div[contains(@class, "request-notifications") and contains(@role, "dialog")]'
+                        ' | //div[contains(@data-pagelet, "NotificationPermissionsDialog")]'
+                    )
+                )
+            )
+        block_button = popup.find_elements(By.XPATH, './/button[contains(., "Block")]')
+        if not block_button:
+            block_button = popup.find_elements(By.XPATH, './/span[text()="Block"]/ancestor::button')
+        if not block_button:
+            block_button = driver.find_elements(By.XPATH, '//button[contains(., "Block")]')
+        if block_button:
+            block_button[0].click()
+            print("Blocked notification popup.")
+            return
+        print("Notification popup detected but 'Block' button not found.")
+    except TimeoutException:
+        print("Notification popup did not appear.")
+
+
+PROFILE_MENU_LOCATORS: Tuple[Tuple[By, str], ...] = (
+    (By.CSS_SELECTOR, 'div[aria-label="Account"]'),
+    (By.CSS_SELECTOR, 'div[aria-label="Your profile"]'),
+    (By.XPATH, '//div[@aria-label="Account" and @role="button"]'),
+    (By.XPATH, '//div[@aria-label="Your profile" and @role="button"]'),
+)
+
+
+def page_menu_locators(page_name: str) -> Tuple[Tuple[By, str], ...]:
+    """Candidate locators for the Page entry in the account menu."""
+    return (
+        (By.XPATH, f'//span[normalize-space(text())="{page_name}"]/ancestor::div[@role="menuitem"]'),
+        (By.XPATH, f'//div[@role="menuitem" and .//span[normalize-space(text())="{page_name}"]]'),
+        (By.XPATH, f'//span[normalize-space(text())="{page_name}"]'),
+        (By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div[5]/div[2]/div/div[3]/div[1]/div[1]/div/div/div/div/div/div/div/div/div/div[1]/div/div/div[1]/div[1]/div/div/div[1]/div/span/div/div/div/div/div[1]/div/div[2]/div/span"),
+        (By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div[5]/div[2]/div/div[3]/div[1]/div[1]/div/div/div/div/div/div/div/div/div/div[1]/div/div/div[1]/div[1]/div/div/a/div[1]/div[2]/span"),
+        (By.XPATH, "/html/body/div[1]/div/div[1]/div/div[2]/div[5]/div[2]/div/div[2]/div[1]/div[1]/div/div/div/div/div/div/div/div/div/div[1]/div/div/div[1]/div[1]/div/div/div[1]/div/span/div/div/div/div/div[1]/div/div[2]/div/span"),
+    )
+
+
+def click_element(driver: webdriver.Chrome, element: webdriver.remote.webelement.WebElement) -> None:
+    """Click ``element``, falling back to a script click when it is covered."""
+    try:
+        element.click()
+    except (ElementClickInterceptedException, ElementNotInteractableException):
+        driver.execute_script("arguments[0].click();", element)
+
+
+@traced()
+def open_profile_menu(driver: webdriver.Chrome, timeout: int = 10) -> None:
+    """Open the account menu by clicking the top-right profile image."""
+    try:
+        profile_button, _ = race_locators(driver, "profile_menu", PROFILE_MENU_LOCATORS, timeout)
+        click_element(driver, profile_button)
+    except (TimeoutException, StaleElementReferenceException) as exc:
+        raise TimeoutException("Failed to locate the top-right profile menu button.") from exc
+    print("Opened profile menu via top-right profile icon.")
+
+
+@traced()
+def select_page_from_menu(driver: webdriver.Chrome, page_name: str, timeout: int = 10) -> None:
+    """Select the specified page from the account menu."""
+    try:
+        target_element, _ = race_locators(driver, "page_menu_item", page_menu_locators(page_name), timeout)
+        try:
+            clickable = target_element.find_element(
+                By.XPATH, "./ancestor-or-self::*[self::a or self::div[@role='menuitem']][1]"
+            )
+        except NoSuchElementException:
+            clickable = target_element
+        click_element(driver, clickable)
+    except (TimeoutException, StaleElementReferenceException) as exc:
+        raise TimeoutException(f"Unable to find menu item with text '{page_name}'.") from exc
+    print(f"Selected menu item: {page_name}")
+
+
+def press_escape(driver: webdriver.Chrome) -> None:
+    """Close an open menu, tooltip or overlay."""
+    driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+
+
+def reopen_profile_menu(driver: webdriver.Chrome) -> None:
+    """Recovery for a page entry that did not show up: close and reopen the menu."""
+    press_escape(driver)
+    open_profile_menu(driver)
+    wait_for_menu(driver)
+
+
+def renavigate(driver: webdriver.Chrome) -> None:
+    """Recovery of last resort: reload the feed the flow starts from."""
+    print("Reloading the feed to recover.")
+    driver.get(FACEBOOK_URL)
+    dismiss_notification_popup(driver)
+
+
+def wait_for_clickable(
+    driver: webdriver.Chrome, xpath: str, timeout: int = 10
+) -> webdriver.remote.webelement.WebElement:
+    """Wait for the element located by XPath to become clickable."""
+    return WebDriverWait(driver, timeout).until(
+        EC.element_to_be_clickable((By.XPATH, xpath))
+    )
+
+
+def wait_and_click(driver: webdriver.Chrome, xpath: str, timeout: int = 10) -> None:
+    """Wait for the element located by XPath to become clickable and click it."""
+    wait_for_clickable(driver, xpath, timeout).click()
+
+
+def wait_for_presence(
+    driver: webdriver.Chrome, xpath: str, timeout: int = 10
+) -> webdriver.remote.webelement.WebElement:
+    """Wait for the element located by XPath to be present in DOM."""
+    return WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.XPATH, xpath))
+    )
+
+
+@traced()
+def focus_text_field(
+    driver: webdriver.Chrome,
+    timeout: int = 10,
+    poll_interval: float = 0.5,
+) -> webdriver.remote.webelement.WebElement:
+    """Acquire and focus the Facebook Lexical editor using resilient selectors."""
+
+    started = time.time()
+    end_time = started + timeout_for("focus_text_field", timeout)
+
+    while time.time() < end_time:
+        try:
+            element, _ = race_locators(
+                driver,
+                "text_field",
+                LEXICAL_EDITOR_LOCATORS,
+                max(end_time - time.time(), 0),
+                visible=False,
+                adaptive=False,
+            )
+            driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
+            click_element(driver, element)
+            driver.execute_script("arguments[0].focus();", element)
+            is_active = driver.execute_script(
+                "return document.activeElement === arguments[0];",
+                element,
+            )
+            if is_active:
+                record_wait("focus_text_field", time.time() - started, True, timeout)
+                return element
+        except (TimeoutException, StaleElementReferenceException):
+            pass
+        increment_attribute("retries")
+        time.sleep(poll_interval)
+
+    record_wait("focus_text_field", time.time() - started, False, timeout)
+    raise TimeoutException("Unable to focus the text field within timeout.")
+
+
+# Lexical handles paste itself; an HTML payload keeps paragraphs as <p> nodes.
+_PASTE_TEXT_SCRIPT = """
+const [element, text, html] = arguments;
+element.focus();
+const data = new DataTransfer();
+data.setData("text/plain", text);
+data.setData("text/html", html);
+element.dispatchEvent(new ClipboardEvent("paste", { clipboardData: data, bubbles: true, cancelable: true }));
+"""
+_EDITOR_TEXT_SCRIPT = """
+const editor = arguments[0].closest("[contenteditable='true']") || arguments[0];
+return editor.innerText;
+"""
+
+
+def _text_blocks(text: str) -> List[str]:
+    """Split text into its non-empty lines, ignoring whitespace differences."""
+    normalized = text.replace("\u00a0", " ").replace("\u2028", "\n")
+    return [block for block in (line.strip() for line in normalized.splitlines()) if block]
+
+
+def editor_text_matches(element: webdriver.remote.webelement.WebElement, lines: Sequence[str]) -> bool:
+    """Check that the editor holding ``element`` contains exactly ``lines``."""
+    try:
+        actual = element.parent.execute_script(_EDITOR_TEXT_SCRIPT, element) or ""
+    except (StaleElementReferenceException, WebDriverException):
+        return False
+    return _text_blocks(actual) == _text_blocks("\n".join(lines))
+
+
+def _clear_editor(element: webdriver.remote.webelement.WebElement) -> None:
+    # Lexical does not expose .clear(); use keyboard shortcuts instead.
+    element.send_keys(Keys.CONTROL, "a")
+    element.send_keys(Keys.DELETE)
+
+
+def _insert_text_cdp(element: webdriver.remote.webelement.WebElement, lines: Sequence[str]) -> None:
+    """Insert each paragraph with one ``Input.insertText`` call; only breaks are typed."""
+    driver = element.parent
+    for index, line in enumerate(lines):
+        for position, paragraph in enumerate(line.split("\n")):
+            if position:
+                element.send_keys(Keys.ENTER)
+            if paragraph:
+                driver.execute_cdp_cmd("Input.insertText", {"text": paragraph})
+        if index < len(lines) - 1:
+            element.send_keys(Keys.SHIFT, Keys.ENTER)
+
+
+def _insert_text_paste(element: webdriver.remote.webelement.WebElement, lines: Sequence[str]) -> None:
+    """Insert all text with a single synthetic paste event."""
+    paragraphs = "\u2028".join(lines).split("\n")
+    html = "".join(
+        f"<p>{escape(paragraph).replace(chr(0x2028), '<br>') or '<br>'}</p>" for paragraph in paragraphs
+    )
+    element.parent.execute_script(_PASTE_TEXT_SCRIPT, element, "\n".join(lines), html)
+
+
+def _insert_text_keys(element: webdriver.remote.webelement.WebElement, lines: Sequence[str]) -> None:
+    """Type the text one key event per character."""
+    for index, line in enumerate(lines):
+        element.send_keys(line)
+        if index < len(lines) - 1:
+            element.send_keys(Keys.SHIFT, Keys.ENTER)
+
+
+@traced()
+def input_multiline_text(
+    element: webdriver.remote.webelement.WebElement,
+    lines: Sequence[str],
+) -> None:
+    """Insert lines into a content-editable element.
+
+    Newlines inside a line start a new paragraph; consecutive lines are joined
+    with a soft line break. Bulk methods are tried first and verified against
+    the editor content; keystroke entry is the final fallback.
+    """
+    if not lines:
+        return
+
+    methods = [("insert_text", _insert_text_cdp), ("paste", _insert_text_paste)] if fast_text_entry else []
+    for method, insert in methods:
+        _clear_editor(element)
+        try:
+            insert(element, lines)
+        except (AttributeError, StaleElementReferenceException, WebDriverException) as exc:
+            print(f"Text entry via {method} failed: {exc.__class__.__name__}")
+            continue
+        if editor_text_matches(element, lines):
+            set_attribute("method", method)
+            return
+        increment_attribute("retries")
+        print(f"Text entered via {method} did not match the editor content; retrying.")
+
+    _clear_editor(element)
+    _insert_text_keys(element, lines)
+    set_attribute("method", "keys")
+
+
+@traced()
+def upload_media(driver: webdriver.Chrome, container_xpath: str, file_path: Path) -> bool:
+    """Attempt to upload media by locating a file input and sending the file path directly."""
+    if not file_path or not file_path.exists():
+        print("No file path provided or file does not exist.")
+        return False
+
+    # Try to find the file input element directly.
+    # This is often a hidden input that the visible "Add photos/videos" button interacts with.
+    try:
+        # Wait for the file input element to be present and interactable.
+        # We are looking for a file input that is part of the current dialog.
+        # The user's provided text field XPath and the MEDIA_UPLOAD_XPATH share a common prefix,
+        # so we can assume the file input is within the same general area.
+        with timed_wait("upload.file_input", 10) as budget:
+            file_input = WebDriverWait(driver, budget).until(
+                EC.presence_of_element_located((By.XPATH, f"{container_xpath}/ancestor::form//input[@type='file']"))
+            )
+        # Attempt to send keys directly to the file input.
+        file_input.send_keys(str(file_path))
+        set_attribute("method", "direct")
+        print(f"Dynamically uploaded media from {file_path} to file input.")
+        return True
+    except TimeoutException:
+        print("Direct file input element not found within the pop-up. Attempting fallback.")
+    except (InvalidArgumentException, ElementNotInteractableException) as exc:
+        print(f"Failed to upload via direct file input: {exc}. Attempting fallback.")
+
+    # Fallback: If direct upload fails, try clicking the visible button and then finding the input.
+    # This was the previous logic, which the user reported opened a system dialog.
+    # We keep this as a fallback in case the direct approach doesn't work for some reason,
+    # but the goal is to avoid it.
+    try:
+        container_element = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, container_xpath))
+        )
+        container_element.click()
+        print(f"Clicked media upload trigger: {container_xpath} (fallback).")
+        wait_for_file_input(driver)
+
+        input_elements = driver.find_elements(By.XPATH, "//input[@type='file']")
+        for input_element in input_elements:
+            try:
+                if input_element.is_displayed() and input_element.is_enabled():
+                    input_element.send_keys(str(file_path))
+                    set_attribute("method", "fallback")
+                    print(f"Uploaded media from {file_path} via fallback input.")
+                    return True
+            except (InvalidArgumentException, ElementNotInteractableException) as exc:
+                print(f"Failed to upload via located fallback input: {exc}")
+
+    except TimeoutException:
+        print(f"Media upload trigger not found or not clickable (fallback): {container_xpath}.")
+    except ElementClickInterceptedException:
+        driver.execute_script("arguments[0].click();", container_element)
+        print(f"Clicked media upload trigger via JS (fallback): {container_xpath}")
+        wait_for_file_input(driver)
+        input_elements = driver.find_elements(By.XPATH, "//input[@type='file']")
+        for input_element in input_elements:
+            try:
+                if input_element.is_displayed() and input_element.is_enabled():
+                    input_element.send_keys(str(file_path))
+                    set_attribute("method", "js_fallback")
+                    print(f"Uploaded media from {file_path} via JS fallback input.")
+                    return True
+            except (InvalidArgumentException, ElementNotInteractableException) as exc:
+                print(f"Failed to upload via located JS fallback input: {exc}")
+
+    print("Unable to dynamically upload media. The system file selection pop-up might still appear.")
+    return False
+
+
+def download_images(items: Sequence[Dict[str, Any]]) -> List[Optional[Path]]:
+    """Fetch the image of every item through the image cache, keeping the item order."""
+    return [fetch_image(item.get("image", "")) for item in items]
+
+
+def run_startup(
+    job: PostJob,
+    history: PostHistory,
+    journal: PostingJournal,
+    js_heap_limit_mb: Optional[int] = None,
+) -> Tuple[
+    Tuple[webdriver.Chrome, Optional[Path], bool],
+    List[Dict[str, Any]],
+    List[Dict[str, Any]],
+    List[Optional[Path]],
+]:
+    """Launch Chrome, check the cookies, read the feed and prefetch images concurrently.
+
+    Chrome comes up while the key is derived. Cookies are only injected and
+    pages only loaded after the pipeline returns, so a failed cookie check
+    shuts the browser down (stage cleanup) before it touches Facebook.
+    """
+    archive = profile_archive_path(job.slug)
+    stages = [
+        Stage("browser", lambda _: launch_browser(archive, js_heap_limit_mb), cleanup=_close_browser),
+        Stage("cookies", lambda _: load_cookies(Path(job.cookies_file))),
+        Stage(
+            "content",
+            lambda _: journal.resume_candidates(
+                select_candidates(history, job.max_posts, job.content_url, job.similarity_threshold),
+                history,
+                job.max_posts,
+            ),
+        ),
+        Stage("images", lambda deps: download_images(deps["content"]), depends=("content",)),
+    ]
+    try:
+        result = run_pipeline(stages)
+    except PipelineError as exc:
+        print(format_timing_report(exc.timings))
+        raise exc.error
+
+    print(format_timing_report(result.timings, result.wall_time))
+    return (
+        result.results["browser"],
+        result.results["cookies"],
+        result.results["content"],
+        result.results["images"],
+    )
+
+
+@traced()
+def switch_to_page(driver: webdriver.Chrome, page_name: str) -> bool:
+    """Switch the session to act as the given Page; return False if unconfirmed.
+
+    The menu steps are retried in place; if the switch still cannot be
+    confirmed, the feed is reloaded and the whole switch is tried again.
+    """
+
+    def attempt() -> bool:
+        retry_step("open_profile_menu", lambda: open_profile_menu(driver), recoveries=(lambda: press_escape(driver),))
+        if not wait_for_menu(driver):
+            print("Account menu did not report ready; trying to select the page anyway.")
+        retry_step(
+            "select_page",
+            lambda: select_page_from_menu(driver, page_name),
+            recoveries=(lambda: reopen_profile_menu(driver),),
+        )
+        try:
+            with timed_wait("page_header", 15) as budget:
+                WebDriverWait(driver, budget).until(
+                    EC.text_to_be_present_in_element((By.XPATH, PAGE_HEADER_XPATH), page_name)
+                )
+        except TimeoutException:
+            print(f"Failed to confirm page header text '{page_name}'.")
+            return False
+        return True
+
+    return retry_step("switch_to_page", attempt, recoveries=(lambda: renavigate(driver),), accept=bool)
+
+
+def discard_composer(driver: webdriver.Chrome) -> bool:
+    """Close the composer, confirming the discard prompt; True once it is gone."""
+    press_escape(driver)
+    for button in driver.find_elements(By.XPATH, DISCARD_BUTTON_XPATH):
+        if button.is_displayed():
+            button.click()
+            break
+    return wait_for_dialog_closed(driver)
+
+
+@traced()
+def reset_composer(driver: webdriver.Chrome, page_name: str) -> bool:
+    """Close any leftover composer and make sure the Page feed is showing again."""
+    if not wait_for_dialog_closed(driver, timeout=5):
+        print("Composer still open; dismissing it before the next post.")
+        if not discard_composer(driver):
+            return False
+
+    header = driver.find_elements(By.XPATH, PAGE_HEADER_XPATH)
+    if header and page_name in header[0].text:
+        return True
+
+    print("Page context lost; reloading and switching to the page again.")
+    driver.get(FACEBOOK_URL)
+    return switch_to_page(driver, page_name)
+
+
+def click_step(driver: webdriver.Chrome, name: str, xpath: str, timeout: int = 10) -> None:
+    """Click the element at ``xpath`` inside a span called ``name``."""
+    with span(name), timed_wait(name, timeout) as budget:
+        wait_and_click(driver, xpath, timeout=budget)
+
+
+def locate_step(
+    driver: webdriver.Chrome, name: str, xpath: str, timeout: int = 10
+) -> webdriver.remote.webelement.WebElement:
+    """Wait for the element at ``xpath`` to be clickable inside a span called ``name``."""
+    with span(name), timed_wait(name, timeout) as budget:
+        return wait_for_clickable(driver, xpath, timeout=budget)
+
+
+def open_composer(driver: webdriver.Chrome) -> None:
+    """Click the "Create post" trigger and wait for the composer's text field."""
+    click_step(driver, "click_create_post", CREATE_POST_TRIGGER_XPATH, timeout=15)
+    # Wait for any of the lexical editor elements to appear
+    print("Waiting for pop-up to appear...")
+    with span("wait.composer"):
+        race_locators(driver, "text_field", LEXICAL_EDITOR_LOCATORS, timeout=15, visible=False)
+
+
+def reopen_composer(driver: webdriver.Chrome, page_name: str) -> None:
+    """Recovery for a composer that stopped responding: discard it and open a new one."""
+    if not reset_composer(driver, page_name):
+        raise TimeoutException("Unable to close the composer.")
+    open_composer(driver)
+    if lean_mode:
+        set_resource_blocking(driver, COMPOSER_BLOCKED_CATEGORIES)
+
+
+@traced()
+def post_item(
+    driver: webdriver.Chrome,
+    candidate: Dict[str, Any],
+    image_path: Optional[Path],
+    history: PostHistory,
+    journal: PostingJournal,
+    page_name: str,
+) -> bool:
+    """Compose, publish and record a single content item on the current Page.
+
+    Each phase is written to ``journal`` before moving on, and the "Post"
+    click is journaled ahead of time so a crash never leads to a re-post.
+    """
+    description_html = candidate.get("description", "").strip()
+    description_lines = strip_html_paragraphs(description_html)
+
+    # Click the "Create post" trigger to open the text input field pop-up.
+    # This addresses the user's first requirement:
+    # "first must click this xpath ... to open text input field where you enter"
+    try:
+        retry_step(
+            "open_composer",
+            lambda: open_composer(driver),
+            recoveries=(lambda: press_escape(driver), lambda: reset_composer(driver, page_name)),
+        )
+    except TRANSIENT_ERRORS:
+        print("Unable to open the composer and locate its text field.")
+        return False
+
+    journal.advance("composer_open")
+    checkpoint(driver, "composer")
+    if lean_mode:
+        # The upload preview may come from the CDN; let images through while composing.
+        set_resource_blocking(driver, COMPOSER_BLOCKED_CATEGORIES)
+
+    # Enter the text content in the same popup.
+    # This addresses the user's second requirement:
+    # "there find xpath ... and enter the content text there."
+    combined_text = "\n\n".join(description_lines) if description_lines else description_html
+    if combined_text:
+        try:
+            retry_step(
+                "enter_text",
+                lambda: input_multiline_text(focus_text_field(driver, timeout=10), [combined_text]),
+                recoveries=(lambda: reopen_composer(driver, page_name),),
+            )
+            journal.advance("text_entered")
+            print("Text content entered successfully.")
+        except TRANSIENT_ERRORS:
+            print("Failed to focus text field for content input.")
+            return False
+
+    # Upload the image (prefetched during startup) in the same popup.
+    # This addresses the user's third requirement:
+    # "then on the same opened pop up upload the image."
+    if image_path:
+        # No recovery action: Escape would close the composer with the text in it.
+        uploaded = retry_step("upload_media", lambda: upload_media(driver, MEDIA_UPLOAD_XPATH, image_path), accept=bool)
+        if uploaded:
+            print("Media uploaded successfully.")
+            # Wait for the thumbnail to render instead of a fixed pause.
+            if not wait_for_upload_complete(driver):
+                print("Upload thumbnail not confirmed within timeout; continuing.")
+            journal.advance("media_uploaded")
+        else:
+            print("Media upload failed.")
+
+    # Click the "Next" button once Facebook enables it.
+    if not wait_for_button_enabled(driver, NEXT_BUTTON_XPATH):
+        print("'Next' button did not report enabled; attempting click anyway.")
+    try:
+        retry_step(
+            "click_next",
+            lambda: click_step(driver, "click_next", NEXT_BUTTON_XPATH),
+            recoveries=(lambda: wait_for_button_enabled(driver, NEXT_BUTTON_XPATH),),
+        )
+        print("Clicked 'Next' button.")
+    except TRANSIENT_ERRORS:
+        print("Failed to locate or click 'Next' button.")
+        return False
+
+    # Wait for and click the "Post" button once it is enabled.
+    wait_for_button_enabled(driver, POST_BUTTON_XPATH, name="post")
+    install_network_tracker(driver)
+    monitor = PublishMonitor(driver)
+    monitor.arm()
+    phase_before_click = journal.phase
+    try:
+        # Only locating the button is retried: a click that raised may still
+        # have reached the page, so clicking again could publish twice.
+        post_button = retry_step(
+            "locate_post",
+            lambda: locate_step(driver, "locate_post", POST_BUTTON_XPATH),
+            recoveries=(lambda: wait_for_button_enabled(driver, POST_BUTTON_XPATH, name="post"),),
+        )
+    except TRANSIENT_ERRORS:
+        print("Failed to locate the 'Post' button.")
+        return False
+
+    journal.advance("publish_clicked")
+    click_failed = False
+    try:
+        with span("click_post"):
+            post_button.click()
+        print("Clicked 'Post' button.")
+    except WebDriverException as exc:
+        # The click may have been delivered; the publish request decides.
+        click_failed = True
+        print(f"Clicking 'Post' raised {exc.__class__.__name__}; checking whether the post went out.")
+
+    # Facebook's answer to the publish request is the confirmation; fall
+    # back to the composer closing when the request could not be observed.
+    result = monitor.wait()
+    if result.observed:
+        if result.rejected:
+            print(f"Publish request failed (status {result.status}): {result.error or 'no details'}")
+            journal.advance(phase_before_click, last_error=f"publish rejected: {result.error or result.status}")
+            return False
+        if not result.ok:
+            # Sent but unanswered: the post may exist. The journal stays at
+            # publish_clicked so the next run records it instead of posting again.
+            print(f"Publish request outcome unknown (status {result.status}): {result.error or 'no response'}")
+            return False
+        confirmation = "network"
+        journal.advance("posted", post_id=result.post_id)
+        print(f"Post published in {result.elapsed:.2f}s (post ID {result.post_id or 'unknown'}).")
+    else:
+        confirmation = "dialog"
+        if not wait_for_dialog_closed(driver):
+            if click_failed:
+                # Outcome unknown; the next run records it from the journal.
+                print("Composer dialog is still open after the failed click.")
+                return False
+            confirmation = "none"
+            print("Composer dialog did not close within timeout.")
+        if not wait_for_network_idle(driver):
+            print("Network did not settle within timeout.")
+    if lean_mode:
+        set_resource_blocking(driver, LEAN_BLOCKED_CATEGORIES)
+
+    history.append(
+        {
+            "title": candidate.get("title", "").strip(),
+            "description": description_html,
+            "image": candidate.get("image", "").strip(),
+            "post_id": result.post_id,
+            "confirmation": confirmation,
+        },
+    )
+    journal.clear()
+    print("Content recorded in post history.")
+    return True
+
+
+def post_candidates(
+    driver: webdriver.Chrome,
+    job: PostJob,
+    cookies: List[Dict[str, Any]],
+    profile_restored: bool,
+    candidates: Sequence[Dict[str, Any]],
+    image_paths: Sequence[Optional[Path]],
+    history: PostHistory,
+    journal: PostingJournal,
+    limiter: AccountRateLimiter,
+) -> int:
+    """Log in, switch to the job's Page and post the candidates in order."""
+    open_authenticated_session(driver, cookies, profile_restored)
+
+    checkpoint(driver, "feed")
+
+    dismiss_notification_popup(driver)
+
+    if not switch_to_page(driver, job.page_name):
+        capture(driver, "switch_to_page")
+        print("Exiting.")
+        return 0
+
+    return post_batch(driver, job, candidates, image_paths, history, journal, limiter)
+
+
+def post_batch(
+    driver: webdriver.Chrome,
+    job: PostJob,
+    candidates: Sequence[Dict[str, Any]],
+    image_paths: Sequence[Optional[Path]],
+    history: PostHistory,
+    journal: PostingJournal,
+    limiter: AccountRateLimiter,
+    reset_first: bool = False,
+) -> int:
+    """Post the candidates in order from a session already acting as the Page.
+
+    With ``reset_first`` the composer and Page context are checked before
+    the first item too, as needed by a session that was left idle.
+    """
+    posted = 0
+    for index, (candidate, image_path) in enumerate(zip(candidates, image_paths)):
+        if (index > 0 or reset_first) and not reset_composer(driver, job.page_name):
+            capture(driver, "reset_composer")
+            print("Unable to recover the composer state. Stopping batch.")
+            break
+
+        print(f"[{job.name}] Posting item {index + 1} of {len(candidates)}: {candidate.get('title', '').strip()}")
+        journal.begin(candidate, image_path)
+        with limiter.slot(job.account_key):
+            succeeded = post_item(driver, candidate, image_path, history, journal, job.page_name)
+        if not succeeded:
+            journal.rewind("post_item failed")
+            capture(driver, "post_item")
+            print("Posting failed. Stopping.")
+            break
+        posted += 1
+    return posted
+
+
+def run_job(
+    job: PostJob,
+    limiter: Optional[AccountRateLimiter] = None,
+    memory_limit_mb: Optional[int] = None,
+) -> int:
+    """Run one posting job in its own browser and return the number of posts made."""
+    with trace_run(job.name):
+        return _run_job(job, limiter, memory_limit_mb)
+
+
+def _run_job(
+    job: PostJob,
+    limiter: Optional[AccountRateLimiter],
+    memory_limit_mb: Optional[int],
+) -> int:
+    limiter = limiter or AccountRateLimiter(0)
+    history = open_history(job)
+    journal = PostingJournal.for_job(job.slug)
+    journal.recover(history)
+
+    driver = None # Initialize driver to None
+    profile_dir = None
+    completed = False
+    try:
+        # Leave half of the cap for the renderer's non-heap memory.
+        heap_limit = memory_limit_mb // 2 if memory_limit_mb else None
+        browser, cookies, candidates, image_paths = run_startup(job, history, journal, heap_limit)
+        driver, profile_dir, profile_restored = browser
+        if not candidates:
+            print(f"[{job.name}] No new content available to post. Closing browser.")
+            return 0 # This return will now jump to the finally block
+
+        watchdog_context = (
+            MemoryWatchdog(driver.service.process.pid, memory_limit_mb, lambda _: driver.quit())
+            if memory_limit_mb
+            else nullcontext()
+        )
+        with watchdog_context as watchdog:
+            try:
+                posted = post_candidates(
+                    driver, job, cookies, profile_restored, candidates, image_paths, history, journal, limiter
+                )
+            except WebDriverException as exc:
+                if watchdog is not None and watchdog.tripped:
+                    raise RuntimeError(f"Browser exceeded the {memory_limit_mb} MB memory cap") from exc
+                capture(driver, "post_candidates")
+                raise
+
+        if not posted:
+            return 0
+
+        # Facebook extends the session while it is used; keep the bundle current.
+        harvest_cookies(driver, job)
+
+        completed = True
+        print(f"[{job.name}] Task completed. Posted {posted} item(s).")
+        return posted
+    finally:
+        if driver:
+            print("Closing browser automatically.")
+            driver.quit()
+        if profile_dir is not None:
+            # Chrome flushes its cookie store on exit, so archive after quit.
+            if completed:
+                try:
+                    save_profile(profile_dir, get_password(), profile_archive_path(job.slug))
+                except Exception as exc:
+                    print(f"Failed to save browser profile: {exc}")
+            discard_profile(profile_dir)
@@ -1,7 +1,18 @@
+"""Log in to Facebook once and store the session cookies for post_content.py.
+
+Login completion is detected from DevTools events in Chrome's performance
+log: the ``Set-Cookie`` headers of each response and main-frame navigations.
+The session counts as ready once ``c_user`` and ``xs`` have been set and the
+cookie jar has been quiet for ``COOKIE_QUIET_PERIOD`` seconds. The cookies
+are then encrypted with ``DECRYPT_KEY`` straight into
+``cookies.json.encrypted``; no plaintext copy is written.
+"""
+import argparse
 import json
 import os
 import sys
 import time
+from pathlib import Path
 
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
@@ -9,11 +20,13 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.keys import Keys
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from dotenv import load_dotenv
 
+from driver_resolver import resolve_chromedriver
+from lean_browser import PERFORMANCE_LOG_CAPABILITY
+from vault import get_password, write_envelope
+
 headless = False
 
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36"
@@ -22,7 +35,11 @@ EMAIL_XPATH = '//*[@id="email"]'
 PASSWORD_XPATH = '//*[@id="pass"]'
 LOGIN_BUTTON_XPATH = "//*[starts-with(@id, 'u_0_5_')]"
 TWO_STEP_URL_FRAGMENT = "facebook.com/two_step_verification/authentication"
-COOKIES_FILE = "d:/Workspace/face_flow/cookies.json"
+COOKIES_FILE = Path(__file__).resolve().parent / "cookies.json.encrypted"
+SESSION_COOKIES = {"c_user", "xs"}
+# The cookie jar counts as settled once no cookie has been set for this long.
+COOKIE_QUIET_PERIOD = 2.0
+EVENT_POLL_INTERVAL = 0.2
 
 
 def load_credentials():
@@ -62,8 +79,10 @@ def configure_driver():
     options.add_argument("--no-sandbox")
     options.add_argument("--log-level=3")  # Suppress Chrome's verbose logging
     options.add_experimental_option("excludeSwitches", ["enable-logging"])  # Hide DevTools banner
+    # Network and Page events are read from the performance log.
+    options.set_capability("goog:loggingPrefs", PERFORMANCE_LOG_CAPABILITY)
 
-    service = Service(ChromeDriverManager().install(), log_path=os.devnull)
+    service = Service(resolve_chromedriver(), log_path=os.devnull)
     driver = webdriver.Chrome(service=service, options=options)
 
     if not headless:
@@ -91,44 +110,92 @@ def perform_login(driver, email, password):
     login_button.click()
 
 
+def read_devtools_events(driver):
+    """Return the Network and Page events logged since the previous call."""
+    events = []
+    for entry in driver.get_log("performance"):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, TypeError, ValueError):
+            continue
+        if message.get("method", "").startswith(("Network.", "Page.")):
+            events.append(message)
+    return events
+
+
+def set_cookie_names(headers):
+    """Return the names of the cookies set by a response's headers."""
+    names = set()
+    for key, value in (headers or {}).items():
+        if key.lower() != "set-cookie":
+            continue
+        for line in str(value).split("\n"):
+            name = line.split("=", 1)[0].strip()
+            if name:
+                names.add(name)
+    return names
+
+
 def wait_for_login(driver, timeout=120):
-    """Wait until the user is fully authenticated and no two-step verification is pending."""
-    wait = WebDriverWait(driver, timeout, poll_frequency=1)
+    """Wait until the session cookies are set, the jar is quiet and no two-step check is pending."""
+    deadline = time.monotonic() + timeout
+    current_url = driver.current_url
+    cookies_set = set()
+    last_change = time.monotonic()
     two_step_notice_shown = False
 
-    def _check_login_state(_):
-        nonlocal two_step_notice_shown
-        current_url = driver.current_url
+    while time.monotonic() < deadline:
+        try:
+            events = read_devtools_events(driver)
+        except WebDriverException:
+            # No performance log: fall back to reading the cookie jar.
+            events = []
+            current_url = driver.current_url
+            names = {cookie.get("name") for cookie in driver.get_cookies()}
+            if names - cookies_set:
+                cookies_set |= names
+                last_change = time.monotonic()
+
+        for event in events:
+            params = event.get("params", {})
+            if event["method"] == "Page.frameNavigated" and not params.get("frame", {}).get("parentId"):
+                current_url = params["frame"].get("url", current_url)
+                last_change = time.monotonic()
+            elif event["method"] == "Network.responseReceivedExtraInfo":
+                names = set_cookie_names(params.get("headers"))
+                if names:
+                    cookies_set |= names
+                    last_change = time.monotonic()
+
         if TWO_STEP_URL_FRAGMENT in current_url:
             if not two_step_notice_shown:
                 print("Human intervention required: complete the two-step verification in the browser.")
                 two_step_notice_shown = True
-            return False
-
-        # Check for the presence of a session cookie to confirm authentication.
-        cookies = driver.get_cookies()
-        has_session_cookie = any(cookie.get("name") == "c_user" for cookie in cookies)
-        return has_session_cookie
+        elif SESSION_COOKIES <= cookies_set and time.monotonic() - last_change >= COOKIE_QUIET_PERIOD:
+            return
+        time.sleep(EVENT_POLL_INTERVAL)
 
-    wait.until(_check_login_state)
+    raise TimeoutException("Login was not confirmed within timeout.")
 
 
-def save_cookies(driver):
-    """Wait for login to settle, then save cookies to a JSON file."""
-    time.sleep(15)
-    body = driver.find_element(By.TAG_NAME, "body")
-    body.send_keys(Keys.ESCAPE)
-    time.sleep(15)
+def save_cookies(driver, password, output=COOKIES_FILE):
+    """Encrypt the browser's cookies into ``output``, replacing it atomically."""
     cookies = driver.get_cookies()
-
-    with open(COOKIES_FILE, "w", encoding="utf-8") as file:
-        json.dump(cookies, file, indent=2)
+    missing = SESSION_COOKIES - {cookie.get("name") for cookie in cookies}
+    if missing:
+        raise RuntimeError("Session cookie(s) missing from the browser: " + ", ".join(sorted(missing)))
+    write_envelope(Path(output), json.dumps(cookies).encode("utf-8"), password)
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Log in to Facebook and store encrypted session cookies.")
+    parser.add_argument("--output", type=Path, default=COOKIES_FILE, help="Encrypted cookies file to write.")
+    args = parser.parse_args()
+
     try:
         email, password = load_credentials()
-    except EnvironmentError as error:
+        encryption_key = get_password()
+    except (EnvironmentError, RuntimeError) as error:
         print(str(error), file=sys.stderr)
         sys.exit(1)
 
@@ -144,8 +211,8 @@ def main():
                 "complete it in the browser and re-run the script."
             )
             sys.exit(1)
-        save_cookies(driver)
-        print(f"Cookies saved to {COOKIES_FILE}")
+        save_cookies(driver, encryption_key, args.output)
+        print(f"Encrypted cookies saved to {args.output}")
     finally:
         if driver is not None:
             driver.quit()
@@ -0,0 +1,172 @@
+"""Append-only post history with a content-digest index.
+
+Each posted entry is written as one JSON line to ``posted_content.jsonl``.
+Nothing is ever rewritten on the hot path, so the cost of recording a post
+does not grow with the size of the history, and git diffs of the file are
+plain appends. On load, an in-memory index from content digest to entry
+answers "already posted?" in O(1).
+
+The previous ``posted_content.json`` list (newest first) and the legacy
+``{"descriptions": [...]}`` structure are migrated into the log the first
+time it is opened. ``compact`` rewrites the log without duplicate digests
+and runs automatically once duplicates make up a noticeable share of it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+HISTORY_LOG_FILE = Path(__file__).resolve().parent / "posted_content.jsonl"
+LEGACY_HISTORY_FILE = Path(__file__).resolve().parent / "posted_content.json"
+# Compact once the log holds this many more lines than unique entries.
+COMPACT_SLACK = 50
+
+
+def content_digest(description: str) -> str:
+    """Return the digest used to identify a description in the history."""
+    return hashlib.sha256(description.strip().encode("utf-8")).hexdigest()
+
+
+def load_legacy_history(history_file: Path) -> List[Dict[str, Any]]:
+    """Return entries from a legacy JSON history file (newest first)."""
+    if not history_file.exists():
+        return []
+
+    try:
+        data = json.loads(history_file.read_text(encoding="utf-8"))
+    except json.JSONDecodeError:
+        return []
+
+    if isinstance(data, list):
+        return [entry for entry in data if isinstance(entry, dict)]
+
+    if isinstance(data, dict) and "descriptions" in data and isinstance(data["descriptions"], list):
+        # Legacy structure: {"descriptions": ["..."]}
+        return [
+            {"title": "", "description": str(item).strip(), "image": ""}
+            for item in data["descriptions"]
+        ]
+
+    return []
+
+
+def _iter_log(log_file: Path) -> Iterator[Dict[str, Any]]:
+    with log_file.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from an interrupted append; skip it.
+                continue
+            if isinstance(record, dict):
+                yield record
+
+
+def _write_atomic(path: Path, records: List[Dict[str, Any]]) -> None:
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+
+
+class PostHistory:
+    """Indexed view over the append-only history log."""
+
+    def __init__(self, log_file: Path = HISTORY_LOG_FILE, legacy_file: Optional[Path] = LEGACY_HISTORY_FILE) -> None:
+        self.log_file = log_file
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._line_count = 0
+
+        if not log_file.exists() and legacy_file is not None and legacy_file.exists():
+            self.migrate(legacy_file)
+        if log_file.exists():
+            self._load()
+
+    def _load(self) -> None:
+        self._index.clear()
+        self._line_count = 0
+        for record in _iter_log(self.log_file):
+            self._line_count += 1
+            digest = record.get("digest") or content_digest(record.get("description", ""))
+            record["digest"] = digest
+            self._index.setdefault(digest, record)
+
+    def migrate(self, legacy_file: Path) -> int:
+        """Import a legacy JSON history into the log; return the entry count."""
+        legacy_entries = load_legacy_history(legacy_file)
+        records = []
+        seen = set()
+        # Legacy files are newest first; the log is chronological.
+        for entry in reversed(legacy_entries):
+            description = str(entry.get("description", "")).strip()
+            if not description:
+                continue
+            digest = content_digest(description)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            records.append({**entry, "description": description, "digest": digest})
+
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.log_file, records)
+        print(f"Migrated {len(records)} history entries from {legacy_file.name} to {self.log_file.name}")
+        return len(records)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, description: object) -> bool:
+        return isinstance(description, str) and self.has_posted(description)
+
+    def has_posted(self, description: str) -> bool:
+        """Return True if the description is already in the history."""
+        return content_digest(description) in self._index
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Return the recorded entries, newest first."""
+        return list(reversed(list(self._index.values())))
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Append an entry to the log and index it."""
+        description = str(entry.get("description", "")).strip()
+        record = {
+            **entry,
+            "description": description,
+            "digest": content_digest(description),
+            "posted_at": entry.get("posted_at") or datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        with self.log_file.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+        self._line_count += 1
+        self._index.setdefault(record["digest"], record)
+        self.maybe_compact()
+        return record
+
+    def maybe_compact(self) -> bool:
+        """Compact the log when duplicate lines exceed ``COMPACT_SLACK``."""
+        if self._line_count - len(self._index) < COMPACT_SLACK:
+            return False
+        self.compact()
+        return True
+
+    def compact(self) -> None:
+        """Rewrite the log keeping the first record for each digest."""
+        if not self.log_file.exists():
+            return
+        _write_atomic(self.log_file, list(self._index.values()))
+        self._line_count = len(self._index)
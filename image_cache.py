@@ -0,0 +1,261 @@
+"""Persistent, content-addressed cache for post images.
+
+Images are stored once per content hash under ``.cache/images/blobs`` and
+indexed by URL hash in ``index.json`` together with their ``ETag`` /
+``Last-Modified`` validators. Downloads stream to a per-URL ``.part`` file
+and resume with a ``Range`` request after an interruption. Entries older
+than ``IMAGE_REVALIDATE_AFTER`` are revalidated with a conditional request,
+and the least recently used entries are evicted once the cache grows past
+``IMAGE_CACHE_MAX_BYTES``.
+"""
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from urllib.parse import urlsplit
+
+from content_loader import CACHE_DIR, SHARED_POOL, USER_AGENT, ConnectionPool, iter_body, open_request
+from tracing import set_attribute, traced
+
+IMAGE_CACHE_DIR = CACHE_DIR / "images"
+IMAGE_CACHE_MAX_BYTES = 200 * 1024 * 1024
+# Entries validated more recently than this are served without a request.
+IMAGE_REVALIDATE_AFTER = 6 * 60 * 60
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+_index_lock = threading.Lock()
+_url_locks: Dict[str, threading.Lock] = {}
+# Blobs handed out by this process; never evicted while the process runs.
+_pinned: Set[str] = set()
+
+
+def url_key(url: str) -> str:
+    """Return the index key for an image URL."""
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:24]
+
+
+def _url_lock(key: str) -> threading.Lock:
+    with _index_lock:
+        return _url_locks.setdefault(key, threading.Lock())
+
+
+def _extension(url: str) -> str:
+    suffix = Path(urlsplit(url).path).suffix.lower()
+    return suffix if suffix in IMAGE_EXTENSIONS else ".jpg"
+
+
+class ImageCache:
+    """Content-addressed image store with an LRU size budget."""
+
+    def __init__(
+        self,
+        root: Path = IMAGE_CACHE_DIR,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+        pool: Optional[ConnectionPool] = None,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.pool = pool or SHARED_POOL
+        self.blob_dir = root / "blobs"
+        self.partial_dir = root / "partial"
+        self.index_file = root / "index.json"
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_file.with_name(f"{self.index_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temp_path.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        os.replace(temp_path, self.index_file)
+
+    def _update_entry(self, key: str, entry: Optional[Dict[str, Any]]) -> None:
+        with _index_lock:
+            index = self._load_index()
+            if entry is None:
+                index.pop(key, None)
+            else:
+                index[key] = entry
+            self._save_index(index)
+
+    def blob_path(self, entry: Dict[str, Any]) -> Path:
+        return self.blob_dir / f"{entry['sha256']}{entry.get('ext', '.jpg')}"
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the index entry for ``url`` if its blob is still on disk."""
+        with _index_lock:
+            entry = self._load_index().get(url_key(url))
+        if entry and self.blob_path(entry).exists():
+            return entry
+        return None
+
+    @traced("image_cache.fetch")
+    def fetch(self, url: str) -> Optional[Path]:
+        """Return a local path for ``url``, downloading or revalidating as needed."""
+        key = url_key(url)
+        with _url_lock(key):
+            entry = self.lookup(url)
+            if entry and time.time() - entry.get("validated_at", 0) < IMAGE_REVALIDATE_AFTER:
+                set_attribute("status", "fresh")
+                return self._touch(key, entry)
+            try:
+                path = self._download(url, key, entry)
+            except (http.client.HTTPException, OSError, RuntimeError) as exc:
+                if entry:
+                    print(f"Image revalidation failed ({exc}); using cached copy.")
+                    set_attribute("status", "stale")
+                    return self._touch(key, entry)
+                print(f"Failed to download image from {url}: {exc}")
+                return None
+        self.evict()
+        return path
+
+    def _touch(self, key: str, entry: Dict[str, Any], **updates: Any) -> Path:
+        entry = {**entry, **updates, "last_used": time.time()}
+        self._update_entry(key, entry)
+        path = self.blob_path(entry)
+        _pinned.add(path.name)
+        return path
+
+    def _download(self, url: str, key: str, entry: Optional[Dict[str, Any]]) -> Path:
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        partial_path = self.partial_dir / f"{key}.part"
+        partial_meta_path = self.partial_dir / f"{key}.part.json"
+
+        headers = {"User-Agent": USER_AGENT, "Connection": "keep-alive"}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        partial_meta: Dict[str, Any] = {}
+        offset = partial_path.stat().st_size if partial_path.exists() else 0
+        if offset:
+            try:
+                partial_meta = json.loads(partial_meta_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                partial_meta = {}
+            validator = partial_meta.get("etag") or partial_meta.get("last_modified")
+            if partial_meta.get("url") == url and validator:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = validator
+            else:
+                offset = 0
+
+        response, connection, pool_key, _ = open_request(self.pool, url, headers)
+
+        if response.status == 304 and entry:
+            response.read()
+            self.pool.release(*pool_key, connection)
+            set_attribute("status", 304)
+            return self._touch(key, entry, validated_at=time.time())
+
+        if response.status not in (200, 206):
+            response.read()
+            self.pool.release(*pool_key, connection)
+            if response.status == 416:
+                # The partial file no longer lines up with the remote image.
+                partial_path.unlink(missing_ok=True)
+            raise RuntimeError(f"HTTP {response.status}")
+
+        resumed = response.status == 206 and offset > 0
+        etag = response.getheader("ETag")
+        last_modified = response.getheader("Last-Modified")
+        partial_meta_path.write_text(
+            json.dumps({"url": url, "etag": etag, "last_modified": last_modified}), encoding="utf-8"
+        )
+
+        digest = hashlib.sha256()
+        if resumed:
+            with partial_path.open("rb") as existing:
+                for chunk in iter(lambda: existing.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        with partial_path.open("ab" if resumed else "wb") as handle:
+            for chunk in iter_body(response):
+                handle.write(chunk)
+                digest.update(chunk)
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.pool.release(*pool_key, connection)
+
+        new_entry = {
+            "url": url,
+            "sha256": digest.hexdigest(),
+            "ext": _extension(url),
+            "size": partial_path.stat().st_size,
+            "etag": etag,
+            "last_modified": last_modified,
+            "validated_at": time.time(),
+        }
+        blob = self.blob_path(new_entry)
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        if blob.exists():
+            partial_path.unlink()
+        else:
+            os.replace(partial_path, blob)
+        partial_meta_path.unlink(missing_ok=True)
+
+        set_attribute("status", 206 if resumed else 200)
+        set_attribute("bytes", new_entry["size"])
+        print(f"Cached image {url} as {blob.name}")
+        return self._touch(key, new_entry)
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits its budget."""
+        removed = 0
+        with _index_lock:
+            index = self._load_index()
+            blobs: Dict[str, int] = {}
+            for entry in index.values():
+                blobs[self.blob_path(entry).name] = entry.get("size", 0)
+            total = sum(blobs.values())
+            if total <= self.max_bytes:
+                return 0
+
+            for key, entry in sorted(index.items(), key=lambda item: item[1].get("last_used", 0)):
+                if total <= self.max_bytes:
+                    break
+                name = self.blob_path(entry).name
+                if name in _pinned:
+                    continue
+                del index[key]
+                if any(self.blob_path(other).name == name for other in index.values()):
+                    continue  # Another URL still refers to the same content.
+                self.blob_path(entry).unlink(missing_ok=True)
+                total -= blobs.pop(name, 0)
+                removed += 1
+            self._save_index(index)
+        if removed:
+            print(f"Evicted {removed} cached image(s) to stay within {self.max_bytes // (1024 * 1024)} MB.")
+        return removed
+
+
+_DEFAULT_CACHE = ImageCache()
+
+
+def use_image_cache_dir(root: Path) -> None:
+    """Serve ``fetch_image`` from a cache under ``root`` instead of ``IMAGE_CACHE_DIR``."""
+    global _DEFAULT_CACHE
+    _DEFAULT_CACHE = ImageCache(root)
+
+
+def fetch_image(url: str) -> Optional[Path]:
+    """Fetch ``url`` through the shared on-disk image cache."""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        print(f"Skipping invalid image URL: {url}")
+        return None
+    return _DEFAULT_CACHE.fetch(url)
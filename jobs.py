@@ -0,0 +1,266 @@
+"""Job model and bounded worker pool for posting to several Pages/accounts.
+
+A job ties together a cookie bundle (the account), the Page to act as, the
+content feed to read and the history log for that Page. Jobs are described
+in a JSON file::
+
+    {
+      "workers": 2,
+      "memory_limit_mb": 1500,
+      "account_min_interval": 120,
+      "jobs": [
+        {"name": "legal-mind", "page_name": "The Legal Mind",
+         "cookies_file": "cookies.json.encrypted"},
+        {"name": "second-page", "page_name": "Another Page",
+         "cookies_file": "other_cookies.json.encrypted",
+         "content_url": "https://raw.githubusercontent.com/.../content.json",
+         "max_posts": 2, "similarity_threshold": 0.9}
+      ]
+    }
+
+Relative paths are resolved against the jobs file. Each job runs its own
+headless Chrome; the pool bounds how many run at once, a watchdog enforces a
+per-browser memory cap and a per-account limiter spaces out posts made with
+the same cookies.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from content_loader import CONTENT_RAW_URL
+from near_duplicates import NEAR_DUPLICATE_THRESHOLD
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_JOB_NAME = "default"
+DEFAULT_WORKERS = 2
+DEFAULT_ACCOUNT_MIN_INTERVAL = 60.0
+WATCHDOG_INTERVAL = 2.0
+
+
+def slugify(value: str) -> str:
+    """Return a filesystem-friendly identifier for a job name."""
+    slug = re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")
+    return slug or "job"
+
+
+@dataclass
+class PostJob:
+    """One (account, Page, content source) combination to post for."""
+
+    name: str
+    page_name: str
+    cookies_file: Path
+    content_url: str = CONTENT_RAW_URL
+    history_file: Optional[Path] = None
+    max_posts: int = 1
+    # None disables near-duplicate detection against the history.
+    similarity_threshold: Optional[float] = NEAR_DUPLICATE_THRESHOLD
+
+    def __post_init__(self) -> None:
+        if self.history_file is None:
+            self.history_file = BASE_DIR / f"posted_content.{slugify(self.name)}.jsonl"
+
+    @property
+    def slug(self) -> str:
+        return slugify(self.name)
+
+    @property
+    def account_key(self) -> str:
+        """Jobs sharing a cookie bundle share an account rate limit."""
+        return str(Path(self.cookies_file).resolve())
+
+
+@dataclass
+class PoolConfig:
+    workers: int = DEFAULT_WORKERS
+    memory_limit_mb: Optional[int] = None
+    account_min_interval: float = DEFAULT_ACCOUNT_MIN_INTERVAL
+
+
+def load_jobs(jobs_file: Path) -> Tuple[PoolConfig, List[PostJob]]:
+    """Parse a jobs file into the pool configuration and the job list."""
+    data = json.loads(jobs_file.read_text(encoding="utf-8"))
+    if not isinstance(data, dict) or not isinstance(data.get("jobs"), list):
+        raise ValueError("Jobs file must be an object with a 'jobs' list")
+
+    base = jobs_file.resolve().parent
+    config = PoolConfig(
+        workers=int(data.get("workers", DEFAULT_WORKERS)),
+        memory_limit_mb=data.get("memory_limit_mb"),
+        account_min_interval=float(data.get("account_min_interval", DEFAULT_ACCOUNT_MIN_INTERVAL)),
+    )
+
+    jobs: List[PostJob] = []
+    names = set()
+    for raw in data["jobs"]:
+        try:
+            name = str(raw["name"])
+            page_name = str(raw["page_name"])
+            cookies_file = base / raw["cookies_file"]
+        except KeyError as exc:
+            raise ValueError(f"Job entry is missing required field {exc}") from exc
+        if slugify(name) in names:
+            raise ValueError(f"Duplicate job name: {name}")
+        names.add(slugify(name))
+        history_file = raw.get("history_file")
+        jobs.append(
+            PostJob(
+                name=name,
+                page_name=page_name,
+                cookies_file=cookies_file,
+                content_url=raw.get("content_url", CONTENT_RAW_URL),
+                history_file=base / history_file if history_file else None,
+                max_posts=int(raw.get("max_posts", 1)),
+                similarity_threshold=raw.get("similarity_threshold", NEAR_DUPLICATE_THRESHOLD),
+            )
+        )
+    return config, jobs
+
+
+class AccountRateLimiter:
+    """Serialise posts per account and keep a minimum spacing between them."""
+
+    def __init__(self, min_interval: float) -> None:
+        self.min_interval = min_interval
+        self._locks: Dict[str, threading.Lock] = {}
+        self._last_post: Dict[str, float] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @contextmanager
+    def slot(self, key: str) -> Iterator[None]:
+        """Hold the account's posting slot, waiting out the spacing interval first."""
+        with self._lock_for(key):
+            last = self._last_post.get(key)
+            if last is not None:
+                remaining = self.min_interval - (time.monotonic() - last)
+                if remaining > 0:
+                    print(f"Rate limit: waiting {remaining:.0f}s before the next post for this account...")
+                    time.sleep(remaining)
+            try:
+                yield
+            finally:
+                self._last_post[key] = time.monotonic()
+
+
+def _children(pid: int) -> List[int]:
+    children: List[int] = []
+    task_dir = Path(f"/proc/{pid}/task")
+    try:
+        for task in task_dir.iterdir():
+            text = (task / "children").read_text()
+            children.extend(int(child) for child in text.split())
+    except OSError:
+        pass
+    return children
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Return the resident memory of a process and its descendants (Linux only)."""
+    if not Path("/proc").is_dir():
+        return None
+    total_kb = 0
+    stack = [pid]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            for line in Path(f"/proc/{current}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    total_kb += int(line.split()[1])
+                    break
+        except OSError:
+            continue
+        stack.extend(_children(current))
+    return total_kb / 1024
+
+
+class MemoryWatchdog:
+    """Background thread that calls ``on_exceed`` once the process tree is too large."""
+
+    def __init__(
+        self,
+        pid: int,
+        limit_mb: int,
+        on_exceed: Callable[[float], None],
+        interval: float = WATCHDOG_INTERVAL,
+    ) -> None:
+        self.pid = pid
+        self.limit_mb = limit_mb
+        self.on_exceed = on_exceed
+        self.interval = interval
+        self.peak_mb = 0.0
+        self.tripped = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"memory-watchdog-{pid}", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = process_tree_rss_mb(self.pid)
+            if rss is None:
+                return
+            self.peak_mb = max(self.peak_mb, rss)
+            if rss > self.limit_mb:
+                self.tripped = True
+                print(f"Browser memory {rss:.0f} MB exceeded the {self.limit_mb} MB cap.")
+                self.on_exceed(rss)
+                return
+
+    def __enter__(self) -> "MemoryWatchdog":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join(timeout=self.interval)
+
+
+@dataclass
+class JobOutcome:
+    job: PostJob
+    posted: int = 0
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+def run_jobs(
+    jobs: List[PostJob],
+    runner: Callable[[PostJob, AccountRateLimiter, Optional[int]], int],
+    config: PoolConfig,
+) -> List[JobOutcome]:
+    """Run jobs on a bounded pool; ``runner`` returns the number of posts made."""
+    limiter = AccountRateLimiter(config.account_min_interval)
+    workers = max(1, min(config.workers, len(jobs), os.cpu_count() or 1))
+
+    def _execute(job: PostJob) -> JobOutcome:
+        started = time.perf_counter()
+        outcome = JobOutcome(job)
+        try:
+            outcome.posted = runner(job, limiter, config.memory_limit_mb)
+        except Exception as exc:
+            outcome.error = str(exc) or exc.__class__.__name__
+        outcome.duration = time.perf_counter() - started
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="post-job") as executor:
+        outcomes = list(executor.map(_execute, jobs))
+
+    for outcome in outcomes:
+        status = f"failed: {outcome.error}" if outcome.error else f"posted {outcome.posted}"
+        print(f"[{outcome.job.name}] {status} in {outcome.duration:.1f}s")
+    return outcomes
@@ -0,0 +1,102 @@
+"""Lean headless Chrome for the posting flow.
+
+The flow only needs Facebook's scripts, the composer and the upload
+endpoints, yet a default browser downloads and decodes the whole feed
+(photos, autoplaying video, fonts, analytics beacons). Lean mode adds a set
+of Chrome flags for small, low-memory hosts and blocks unneeded requests by
+URL pattern through CDP ``Network.setBlockedURLs``.
+
+Patterns are grouped by category so the flow can relax blocking while the
+composer is open: the upload preview may be served from the CDN, so images
+are allowed again for that step (``COMPOSER_BLOCKED_CATEGORIES``).
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from jobs import process_tree_rss_mb
+
+LEAN_CHROME_FLAGS: Tuple[str, ...] = (
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-dev-shm-usage",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--autoplay-policy=user-gesture-required",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--renderer-process-limit=2",
+)
+
+# ``goog:loggingPrefs`` for every driver: the DevTools Network/Page events in
+# the performance log confirm publishing and detect the login.
+PERFORMANCE_LOG_CAPABILITY = {"performance": "ALL"}
+
+# Wildcard patterns understood by Network.setBlockedURLs. Scripts, XHR and
+# the upload hosts (upload.facebook.com, rupload.facebook.com) never match.
+BLOCKED_URL_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "video": ("*.mp4*", "*.webm*", "*.m3u8*", "*video*.fbcdn.net/*"),
+    "fonts": ("*.woff2*", "*.woff*", "*.ttf*", "*.otf*"),
+    "trackers": (
+        "*google-analytics.com/*",
+        "*googletagmanager.com/*",
+        "*doubleclick.net/*",
+        "*facebook.com/tr/*",
+        "*facebook.com/tr?*",
+        "*facebook.com/ajax/bz*",
+        "*facebook.com/ajax/bnzai*",
+    ),
+    "images": ("*scontent*.fbcdn.net/*", "*external*.fbcdn.net/*"),
+}
+LEAN_BLOCKED_CATEGORIES: Tuple[str, ...] = ("video", "fonts", "trackers", "images")
+COMPOSER_BLOCKED_CATEGORIES: Tuple[str, ...] = ("video", "fonts", "trackers")
+
+_PAGE_METRICS_SCRIPT = """
+const navigation = performance.getEntriesByType("navigation")[0];
+const resources = performance.getEntriesByType("resource");
+return {
+    dom_content_loaded_ms: navigation ? Math.round(navigation.domContentLoadedEventEnd) : null,
+    load_ms: navigation ? Math.round(navigation.loadEventEnd) : null,
+    resources: resources.length,
+    transfer_kb: Math.round(resources.reduce((sum, entry) => sum + (entry.transferSize || 0), 0) / 1024),
+};
+"""
+
+
+def blocked_patterns(categories: Sequence[str]) -> List[str]:
+    """Return the URL patterns for the given categories."""
+    patterns: List[str] = []
+    for category in categories:
+        patterns.extend(BLOCKED_URL_PATTERNS[category])
+    return patterns
+
+
+def set_resource_blocking(driver: webdriver.Chrome, categories: Sequence[str]) -> bool:
+    """Replace the browser's blocked URL list; returns False if CDP is unavailable."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns(categories)})
+    except WebDriverException as exc:
+        print(f"Unable to configure resource blocking: {exc.__class__.__name__}")
+        return False
+    return True
+
+
+def page_metrics(driver: webdriver.Chrome) -> Dict[str, Any]:
+    """Return navigation timing, resource totals and browser RSS for the current page."""
+    try:
+        metrics: Dict[str, Any] = driver.execute_script(_PAGE_METRICS_SCRIPT) or {}
+    except WebDriverException:
+        metrics = {}
+    rss: Optional[float] = None
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is not None:
+        rss = process_tree_rss_mb(process.pid)
+    metrics["rss_mb"] = round(rss, 1) if rss is not None else None
+    return metrics
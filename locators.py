@@ -0,0 +1,159 @@
+"""Racing locator resolver with a persisted "last winning selector" cache.
+
+Instead of waiting on each candidate selector in turn (a full timeout per
+miss), every poll evaluates all candidates in a single injected script and
+returns the first one that matches. The candidate that won is stored per
+step in ``.cache/locators.json`` together with a fingerprint of the page
+structure; when the next run sees the same fingerprint, the known-good
+candidate is evaluated first.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import JavascriptException, StaleElementReferenceException, TimeoutException
+from selenium.webdriver.remote.webelement import WebElement
+
+from adaptive_timeouts import timed_wait
+from tracing import set_attribute, span
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+LOCATOR_CACHE_FILE = CACHE_DIR / "locators.json"
+POLL_INTERVAL = 0.2
+
+Locator = Tuple[str, str]
+
+# Evaluates every candidate in one round trip. The cached winner (``preferred``)
+# is tried first when the page fingerprint still matches the cached one.
+# Returns [index, element, fingerprint]; index is -1 when nothing matched.
+_RACE_SCRIPT = """
+const [candidates, mode, preferred, preferredFingerprint] = arguments;
+const visible = (el) => {
+    if (!el.isConnected) { return false; }
+    const style = window.getComputedStyle(el);
+    if (style.visibility === "hidden" || style.display === "none") { return false; }
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0;
+};
+const pagelets = Array.from(document.querySelectorAll("[data-pagelet]"))
+    .map((el) => el.getAttribute("data-pagelet"));
+const roles = Array.from(document.querySelectorAll("[role=dialog],[role=menu],[role=banner]"))
+    .map((el) => el.getAttribute("role"));
+const text = location.hostname + "|" + Array.from(new Set(pagelets)).sort().join(",") + "|" + roles.join(",");
+let hash = 5381;
+for (let i = 0; i < text.length; i++) { hash = ((hash << 5) + hash + text.charCodeAt(i)) | 0; }
+const fingerprint = (hash >>> 0).toString(16);
+
+const order = candidates.map((_, i) => i);
+if (preferred >= 0 && preferred < candidates.length && fingerprint === preferredFingerprint) {
+    order.splice(preferred, 1);
+    order.unshift(preferred);
+}
+for (const i of order) {
+    const [by, selector] = candidates[i];
+    let matches = [];
+    try {
+        if (by === "xpath") {
+            const result = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (let j = 0; j < result.snapshotLength; j++) { matches.push(result.snapshotItem(j)); }
+        } else {
+            matches = Array.from(document.querySelectorAll(selector));
+        }
+    } catch (error) {
+        continue;
+    }
+    const found = mode === "visible" ? matches.find(visible) : matches[0];
+    if (found) { return [i, found, fingerprint]; }
+}
+return [-1, null, fingerprint];
+"""
+
+_cache_lock = threading.Lock()
+
+
+def _load_cache(cache_file: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _store_winner(cache_file: Path, step: str, locator: Locator, fingerprint: Optional[str]) -> None:
+    with _cache_lock:
+        cache = _load_cache(cache_file)
+        cache[step] = {"locator": list(locator), "fingerprint": fingerprint}
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(cache, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, cache_file)
+
+
+def cached_winner(
+    step: str, candidates: Sequence[Locator], cache_file: Optional[Path] = None
+) -> Tuple[int, Optional[str]]:
+    """Return the index of the last winning candidate for ``step`` and its fingerprint."""
+    entry = _load_cache(cache_file or LOCATOR_CACHE_FILE).get(step)
+    if not entry:
+        return -1, None
+    winner = tuple(entry.get("locator", ()))
+    for index, candidate in enumerate(candidates):
+        if tuple(candidate) == winner:
+            return index, entry.get("fingerprint")
+    return -1, None
+
+
+def race_locators(
+    driver: webdriver.Chrome,
+    step: str,
+    candidates: Sequence[Locator],
+    timeout: float = 10,
+    visible: bool = True,
+    cache_file: Optional[Path] = None,
+    adaptive: bool = True,
+) -> Tuple[WebElement, Locator]:
+    """Return the first element matched by any candidate, polling all of them at once.
+
+    ``timeout`` is the default for the budget learned for ``locate.<step>``;
+    with ``adaptive=False`` it is used as is. Raises ``TimeoutException``
+    when no candidate matches in time.
+    """
+    cache_file = cache_file or LOCATOR_CACHE_FILE
+    serialized = [[str(by), selector] for by, selector in candidates]
+    preferred, preferred_fingerprint = cached_winner(step, candidates, cache_file)
+    mode = "visible" if visible else "present"
+    polls = 0
+
+    wait = timed_wait(f"locate.{step}", timeout) if adaptive else nullcontext(timeout)
+    with span(f"locate.{step}"), wait as budget:
+        deadline = time.monotonic() + budget
+        while True:
+            polls += 1
+            try:
+                index, element, fingerprint = driver.execute_script(
+                    _RACE_SCRIPT, serialized, mode, preferred, preferred_fingerprint
+                )
+            except (JavascriptException, StaleElementReferenceException):
+                index, element, fingerprint = -1, None, None
+
+            if index >= 0 and element is not None:
+                winner = tuple(candidates[index])
+                set_attribute("locator", winner[1])
+                set_attribute("candidate", index)
+                set_attribute("cache_hit", index == preferred and fingerprint == preferred_fingerprint)
+                set_attribute("polls", polls)
+                if index != preferred or fingerprint != preferred_fingerprint:
+                    _store_winner(cache_file, step, winner, fingerprint)
+                return element, winner  # type: ignore[return-value]
+
+            if time.monotonic() >= deadline:
+                set_attribute("polls", polls)
+                raise TimeoutException(f"No locator matched for step '{step}' within {budget}s")
+            time.sleep(POLL_INTERVAL)
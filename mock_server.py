@@ -0,0 +1,454 @@
+"""Local stand-in for the Facebook and GitHub endpoints used by facebook_flow.
+
+The server renders a synthetic logged-in feed whose DOM is generated from the
+same absolute XPaths and selectors that facebook_flow uses (account button,
+account menu, Page header, "Create post" trigger, Lexical-like composer
+dialog with a file input, "Next"/"Post" buttons). It also serves a raw
+``content.json`` feed with ETag support and the images that feed refers to.
+
+Latency and failures can be injected through ``MockConfig``; the composer
+behaviour (menu, upload processing, publish) is delayed client-side by
+``ui_delay_ms`` so readiness waits see realistic transitions.
+
+Run standalone with ``python mock_server.py --port 8765``.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from dataclasses import asdict, dataclass, field
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from facebook_flow import (
+    CREATE_POST_TRIGGER_XPATH,
+    MEDIA_UPLOAD_XPATH,
+    NEXT_BUTTON_XPATH,
+    PAGE_HEADER_XPATH,
+)
+
+MOCK_PAGE_NAME = "The Legal Mind"
+MOCK_USER_NAME = "Mock User"
+PUBLISH_PATH = "/api/graphql/"
+# Container of the composer dialog; shared prefix of the media and Next paths.
+DIALOG_SLOT_XPATH = "/html/body/div[1]/div/div[1]/div/div[4]"
+
+
+@dataclass
+class MockConfig:
+    """Behaviour knobs for the stand-in server."""
+
+    page_name: str = MOCK_PAGE_NAME
+    feed_items: int = 5
+    paragraphs_per_item: int = 4
+    # Server-side delay added to every response.
+    latency_ms: int = 0
+    # Client-side delay for menu rendering, upload processing and publishing.
+    ui_delay_ms: int = 300
+    # Probability that a publish request fails with HTTP 500.
+    fail_publish_rate: float = 0.0
+    # Leave the Page out of the account menu to exercise the failure path.
+    hide_page_in_menu: bool = False
+    # Serve the login form unless a c_user cookie is sent.
+    require_login: bool = True
+    show_notification_popup: bool = True
+    seed: int = 1234
+
+
+class Element:
+    """Minimal DOM node used to generate markup that matches absolute XPaths."""
+
+    def __init__(self, tag: str, attrs: Optional[Dict[str, str]] = None, text: str = "") -> None:
+        self.tag = tag
+        self.attrs = dict(attrs or {})
+        self.text = text
+        self.children: List[Element] = []
+
+    def child(self, tag: str, position: int = 1) -> "Element":
+        """Return the ``position``-th child with ``tag``, padding with empty siblings."""
+        same = [node for node in self.children if node.tag == tag]
+        while len(same) < position:
+            node = Element(tag)
+            self.children.append(node)
+            same.append(node)
+        return same[position - 1]
+
+    def render(self) -> str:
+        attrs = "".join(f' {key}="{html.escape(value, quote=True)}"' for key, value in self.attrs.items())
+        if self.tag == "input":
+            return f"<input{attrs}>"
+        inner = html.escape(self.text) + "".join(child.render() for child in self.children)
+        return f"<{self.tag}{attrs}>{inner}</{self.tag}>"
+
+
+def ensure_path(root: Element, xpath: str) -> Element:
+    """Create (or reuse) the nodes along an absolute ``/html/...`` XPath."""
+    steps = xpath.strip("/").split("/")
+    if steps[0] != "html":
+        raise ValueError(f"Only absolute /html paths are supported: {xpath}")
+    node = root
+    for step in steps[1:]:
+        match = re.fullmatch(r"([a-z]+)(?:\[(\d+)\])?", step)
+        if not match:
+            raise ValueError(f"Unsupported XPath step '{step}' in {xpath}")
+        node = node.child(match.group(1), int(match.group(2) or 1))
+    return node
+
+
+def build_feed_document(config: MockConfig) -> Tuple[str, str]:
+    """Return ``(body_markup, composer_template_markup)`` for the feed page."""
+    root = Element("html")
+
+    header = ensure_path(root, PAGE_HEADER_XPATH)
+    header.attrs["id"] = "page-header"
+    header.text = MOCK_USER_NAME
+
+    trigger = ensure_path(root, CREATE_POST_TRIGGER_XPATH)
+    trigger.attrs.update({"id": "create-post", "role": "button"})
+    trigger.text = "What's on your mind?"
+
+    media = ensure_path(root, MEDIA_UPLOAD_XPATH)
+    media.attrs.update({"id": "media-trigger", "role": "button", "aria-label": "Photo/video"})
+    media.text = "Photo/video"
+
+    next_label = ensure_path(root, NEXT_BUTTON_XPATH)
+    next_label.text = "Next"
+    next_button = ensure_path(root, NEXT_BUTTON_XPATH.rsplit("/", 2)[0])
+    next_button.attrs.update({"id": "next-button", "role": "button", "aria-disabled": "true"})
+
+    form_path = NEXT_BUTTON_XPATH[: NEXT_BUTTON_XPATH.index("/form") + len("/form")]
+    form = ensure_path(root, form_path)
+    form.attrs["id"] = "composer-form"
+    # Non-div wrappers keep the positional div[n] steps of the real paths intact.
+    editor_wrapper = Element("section")
+    editor_wrapper.children.append(
+        Element(
+            "div",
+            {
+                "id": "composer-editor",
+                "role": "textbox",
+                "contenteditable": "true",
+                "data-lexical-editor": "true",
+                "aria-label": "What's on your mind?",
+            },
+        )
+    )
+    form.children.insert(0, editor_wrapper)
+    form.children.append(Element("input", {"type": "file", "id": "composer-file", "accept": "image/*", "style": "display:none"}))
+    form.children.append(Element("div", {"id": "composer-preview"}))
+    form.children.append(Element("div", {"id": "composer-status"}))
+
+    dialog_slot = ensure_path(root, DIALOG_SLOT_XPATH)
+    dialog_slot.attrs["id"] = "dialog-slot"
+    dialog_box = ensure_path(root, DIALOG_SLOT_XPATH + "/div/div/div[1]")
+    dialog_box.attrs.update({"role": "dialog", "aria-label": "Create post"})
+
+    # Render the composer into a template so it only enters the DOM when opened.
+    template = "".join(child.render() for child in dialog_slot.children)
+    dialog_slot.children = []
+
+    account = Element("div", {"id": "account-button", "aria-label": "Account", "role": "button", "tabindex": "0"}, "Me")
+    body = ensure_path(root, "/html/body")
+    banner = Element("header", {"id": "banner", "role": "banner"})
+    banner.children.append(account)
+    body.children.insert(0, banner)
+    body.children.append(Element("div", {"id": "menu-slot"}))
+    if config.show_notification_popup:
+        popup = Element("div", {"id": "notification-popup", "data-pagelet": "NotificationPermissionsDialog"})
+        popup.children.append(Element("span", text="Allow notifications?"))
+        popup.children.append(Element("button", {"id": "notification-block", "type": "button"}, "Block"))
+        body.children.append(popup)
+
+    markup = "".join(child.render() for child in body.children)
+    return markup, template
+
+
+_PAGE_SCRIPT = r"""
+const CONFIG = JSON.parse(document.getElementById("mock-config").textContent);
+const later = (fn) => setTimeout(fn, CONFIG.ui_delay_ms);
+const slot = document.getElementById("dialog-slot");
+const menuSlot = document.getElementById("menu-slot");
+
+const popup = document.getElementById("notification-popup");
+if (popup) {
+  document.getElementById("notification-block").addEventListener("click", () => popup.remove());
+}
+
+document.getElementById("account-button").addEventListener("click", () => {
+  later(() => {
+    const entries = [CONFIG.user_name];
+    if (!CONFIG.hide_page_in_menu) { entries.push(CONFIG.page_name); }
+    menuSlot.innerHTML = '<div role="menu" id="account-menu">' + entries.map((name) =>
+      '<div role="menuitem" tabindex="0" data-name="' + name + '"><span>' + name + '</span></div>'
+    ).join("") + "</div>";
+    menuSlot.querySelectorAll("[role=menuitem]").forEach((item) => item.addEventListener("click", () => {
+      menuSlot.innerHTML = "";
+      later(() => { document.getElementById("page-header").textContent = item.dataset.name; });
+    }));
+  });
+});
+
+function openComposer() {
+  if (slot.firstChild) { return; }
+  later(() => {
+    slot.innerHTML = document.getElementById("composer-template").innerHTML;
+    const fileInput = document.getElementById("composer-file");
+    const nextButton = document.getElementById("next-button");
+    const enableNext = () => nextButton.setAttribute("aria-disabled", "false");
+    document.getElementById("composer-editor").addEventListener("input", () => {
+      if (!fileInput.files.length) { enableNext(); }
+    });
+    document.getElementById("media-trigger").addEventListener("click", () => fileInput.click());
+    fileInput.addEventListener("change", () => {
+      const preview = document.getElementById("composer-preview");
+      nextButton.setAttribute("aria-disabled", "true");
+      preview.innerHTML = '<div role="progressbar" aria-valuenow="0"></div>';
+      later(() => {
+        const img = document.createElement("img");
+        img.style.width = "200px";
+        img.src = URL.createObjectURL(fileInput.files[0]);
+        preview.innerHTML = "";
+        preview.appendChild(img);
+        enableNext();
+      });
+    });
+    nextButton.addEventListener("click", () => {
+      if (nextButton.getAttribute("aria-disabled") === "true") { return; }
+      later(() => {
+        const form = document.getElementById("composer-form");
+        const post = document.createElement("div");
+        post.setAttribute("role", "button");
+        post.id = "post-button";
+        post.innerHTML = "<span>Post</span>";
+        post.addEventListener("click", publish);
+        form.appendChild(post);
+      });
+    });
+  });
+}
+
+function publish() {
+  const editor = document.getElementById("composer-editor");
+  const body = new URLSearchParams({
+    fb_api_req_friendly_name: "ComposerStoryCreateMutation",
+    message: editor.innerText,
+    page: document.getElementById("page-header").textContent,
+  });
+  fetch(CONFIG.publish_path, { method: "POST", body }).then((response) => {
+    if (!response.ok) {
+      document.getElementById("composer-status").textContent = "Something went wrong.";
+      return;
+    }
+    later(() => { slot.innerHTML = ""; });
+  });
+}
+
+document.getElementById("create-post").addEventListener("click", openComposer);
+"""
+
+_LOGIN_PAGE = """<!DOCTYPE html><html><head><title>Log in</title></head><body>
+<form data-testid="royal_login_form"><input id="email" name="email"><input id="pass" type="password">
+<button type="submit">Log in</button></form></body></html>"""
+
+
+def _png(width: int = 64, height: int = 64, rgb: Tuple[int, int, int] = (40, 90, 160)) -> bytes:
+    """Return a solid-colour PNG image."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    raw = zlib.compress(row * height)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+def build_content_feed(config: MockConfig, base_url: str) -> List[Dict[str, Any]]:
+    """Return a deterministic synthetic ``content.json`` list."""
+    rng = random.Random(config.seed)
+    words = "court statute appeal contract liability tribunal notice compliance filing order".split()
+    items = []
+    for index in range(config.feed_items):
+        paragraphs = [
+            " ".join(rng.choice(words) for _ in range(40)).capitalize() + "."
+            for _ in range(config.paragraphs_per_item)
+        ]
+        items.append(
+            {
+                "title": f"Synthetic article {index + 1}",
+                "description": "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs),
+                "image": f"{base_url}/images/{index + 1}.png",
+            }
+        )
+    return items
+
+
+@dataclass
+class MockState:
+    config: MockConfig
+    posts: List[Dict[str, Any]] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockServer"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - signature from base class
+        return
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _delay(self) -> None:
+        if self.server.state.config.latency_ms:
+            time.sleep(self.server.state.config.latency_ms / 1000)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        self._delay()
+        path = urlsplit(self.path).path
+        config = self.server.state.config
+
+        if path == "/":
+            cookies = SimpleCookie(self.headers.get("Cookie", ""))
+            if config.require_login and "c_user" not in cookies:
+                self._send(200, _LOGIN_PAGE.encode("utf-8"), "text/html; charset=utf-8")
+                return
+            self._send(200, self.server.feed_page, "text/html; charset=utf-8")
+            return
+
+        if path == "/content.json":
+            etag = self.server.content_etag
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", "application/json", {"ETag": etag})
+                return
+            self._send(200, self.server.content_body, "application/json", {"ETag": etag})
+            return
+
+        match = re.fullmatch(r"/images/(\d+)\.png", path)
+        if match:
+            self._send(200, self.server.image_body, "image/png", {"ETag": '"mock-image"'})
+            return
+
+        if path == "/__posts":
+            with self.server.state.lock:
+                body = json.dumps(self.server.state.posts).encode("utf-8")
+            self._send(200, body, "application/json")
+            return
+
+        self._send(404, b"not found", "text/plain")
+
+    def do_HEAD(self) -> None:  # noqa: N802 - http.server naming
+        self.do_GET()
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        self._delay()
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = self.rfile.read(length).decode("utf-8", "replace")
+        if urlsplit(self.path).path != PUBLISH_PATH:
+            self._send(404, b"not found", "text/plain")
+            return
+
+        state = self.server.state
+        if state.config.fail_publish_rate and self.server.rng.random() < state.config.fail_publish_rate:
+            self._send(500, b'{"errors":[{"message":"Injected failure"}]}', "application/json")
+            return
+
+        with state.lock:
+            post_id = f"{len(state.posts) + 1:06d}"
+            state.posts.append({"id": post_id, "payload": payload})
+        body = json.dumps({"data": {"story_create": {"story": {"id": post_id}}}}).encode("utf-8")
+        self._send(200, body, "application/json")
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded HTTP server carrying the mock state."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig) -> None:
+        super().__init__(address, MockHandler)
+        self.state = MockState(config)
+        self.rng = random.Random(config.seed)
+        self.image_body = _png()
+        self._thread: Optional[threading.Thread] = None
+
+        markup, template = build_feed_document(config)
+        page_config = {
+            "page_name": config.page_name,
+            "user_name": MOCK_USER_NAME,
+            "ui_delay_ms": config.ui_delay_ms,
+            "hide_page_in_menu": config.hide_page_in_menu,
+            "publish_path": PUBLISH_PATH,
+        }
+        self.feed_page = (
+            "<!DOCTYPE html><html><head><title>Facebook</title></head><body>"
+            f"{markup}"
+            f'<template id="composer-template">{template}</template>'
+            f'<script type="application/json" id="mock-config">{json.dumps(page_config)}</script>'
+            f"<script>{_PAGE_SCRIPT}</script>"
+            "</body></html>"
+        ).encode("utf-8")
+
+        self.content_body = json.dumps(build_content_feed(config, self.base_url), indent=2).encode("utf-8")
+        self.content_etag = '"' + hashlib.sha1(self.content_body).hexdigest()[:16] + '"'
+
+    @property
+    def base_url(self) -> str:
+        return f"http://localhost:{self.server_address[1]}"
+
+    def start(self) -> "MockServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def start_mock_server(config: Optional[MockConfig] = None, port: int = 0) -> MockServer:
+    """Start the stand-in server on ``port`` (0 picks a free port)."""
+    return MockServer(("127.0.0.1", port), config or MockConfig()).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the local Facebook/GitHub stand-in.")
+    parser.add_argument("--port", type=int, default=8765)
+    for name, value in asdict(MockConfig()).items():
+        flag = "--" + name.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(flag, action="store_true", default=value)
+        else:
+            parser.add_argument(flag, type=type(value), default=value)
+    args = vars(parser.parse_args())
+    port = args.pop("port")
+    server = start_mock_server(MockConfig(**args), port)
+    print(f"Mock server listening on {server.base_url} (feed at {server.base_url}/content.json)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""MinHash/LSH index for spotting near-duplicate descriptions.
+
+The history only recognises a description that matches a posted one
+exactly, so a lightly edited or regenerated article would be posted again.
+Comparing every pending item against every posted one is quadratic, so
+each text is reduced to a MinHash signature and signatures are bucketed by
+LSH bands: only items sharing at least one band bucket are compared.
+
+Signatures use one-permutation hashing: each word shingle is hashed once
+and assigned to one of ``NUM_PERM`` bins keeping the minimum per bin; empty
+bins borrow from a filled bin found by a fixed probe sequence (optimal
+densification). The share of
+equal bins between two signatures estimates the Jaccard similarity of their
+shingle sets. The index is stored next to the history log and is brought
+up to date from the history when it is opened. Measure it with::
+
+    python near_duplicates.py benchmark --size 100000
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+# Estimated Jaccard similarity from which an item counts as already posted.
+NEAR_DUPLICATE_THRESHOLD = 0.8
+INDEX_VERSION = 1
+_HASH_KEY = b"face_flow-minhash"
+_EMPTY = 1 << 32
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+Signature = array
+
+
+def index_path_for(history_file: Path) -> Path:
+    """Return where the index for a history log is stored."""
+    return history_file.with_name(f"{history_file.stem}.minhash.json")
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Return the set of ``size``-word shingles of normalised ``text``."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[index:index + size]) for index in range(len(words) - size + 1)}
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_sequences(num_perm: int, length: int = 64) -> List[List[int]]:
+    """Return, per bin, a fixed pseudo-random order of bins to borrow from."""
+    sequences = []
+    for slot in range(num_perm):
+        sequence = []
+        for attempt in range(length):
+            seed = hashlib.blake2b(f"{slot}:{attempt}".encode("ascii"), digest_size=8, key=_HASH_KEY).digest()
+            sequence.append(int.from_bytes(seed, "little") % num_perm)
+        sequences.append(sequence)
+    return sequences
+
+
+def minhash_signature(text: str, num_perm: int = NUM_PERM, shingle_size: int = SHINGLE_SIZE) -> Optional[Signature]:
+    """Return the one-permutation MinHash signature of ``text`` (None if it has no words)."""
+    tokens = shingles(text, shingle_size)
+    if not tokens:
+        return None
+    bins = [_EMPTY] * num_perm
+    for token in tokens:
+        value = int.from_bytes(
+            hashlib.blake2b(token.encode("utf-8"), digest_size=8, key=_HASH_KEY).digest(), "little"
+        )
+        slot = value % num_perm
+        value >>= 32
+        if value < bins[slot]:
+            bins[slot] = value
+
+    if _EMPTY in bins:
+        # Fill each empty bin from the first filled bin on its own fixed
+        # probe sequence; texts sharing the source bin agree on the value.
+        filled = [value for value in bins if value != _EMPTY]
+        probes = _probe_sequences(num_perm)
+        bins = [
+            value
+            if value != _EMPTY
+            else next((bins[probe] for probe in probes[slot] if bins[probe] != _EMPTY), filled[0])
+            for slot, value in enumerate(bins)
+        ]
+    return array("I", bins)
+
+
+def similarity(first: Signature, second: Signature) -> float:
+    """Estimate the Jaccard similarity of the texts behind two signatures."""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def lsh_parameters(threshold: float, num_perm: int = NUM_PERM) -> Tuple[int, int]:
+    """Return ``(bands, rows)`` whose S-curve rises just below ``threshold``.
+
+    Favouring recall is cheap: every bucket hit is checked against the
+    threshold with the full signature.
+    """
+    best = (num_perm, 1)
+    best_point = 0.0
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        point = (1 / bands) ** (1 / rows)
+        if best_point < point <= threshold:
+            best, best_point = (bands, rows), point
+    return best
+
+
+def _encode(signature: Signature) -> str:
+    data = array("I", signature)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+
+def _decode(text: str) -> Signature:
+    data = array("I")
+    data.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+class NearDuplicateIndex:
+    """LSH buckets over MinHash signatures, keyed by content digest."""
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+        num_perm: int = NUM_PERM,
+        shingle_size: int = SHINGLE_SIZE,
+    ) -> None:
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_parameters(threshold, num_perm)
+        self.signatures: Dict[str, Signature] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.signatures
+
+    def signature(self, text: str) -> Optional[Signature]:
+        return minhash_signature(text, self.num_perm, self.shingle_size)
+
+    def _band_keys(self, signature: Signature) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows].tobytes()
+
+    def add(self, key: str, signature: Signature) -> None:
+        """Index ``signature`` under ``key`` (a history content digest)."""
+        if key in self.signatures:
+            return
+        self.signatures[key] = signature
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+        self.dirty = True
+
+    def retain(self, keys: Set[str]) -> None:
+        """Drop every signature whose key is not in ``keys``."""
+        stale = set(self.signatures) - keys
+        if not stale:
+            return
+        for key in stale:
+            del self.signatures[key]
+        self._buckets.clear()
+        for key, signature in self.signatures.items():
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, []).append(key)
+        self.dirty = True
+
+    def query(self, signature: Signature) -> Optional[Tuple[str, float]]:
+        """Return ``(key, similarity)`` of the closest indexed text at or above the threshold."""
+        candidates: Set[str] = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        best: Optional[Tuple[str, float]] = None
+        for key in candidates:
+            score = similarity(signature, self.signatures[key])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    @classmethod
+    def load(cls, path: Path, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> "NearDuplicateIndex":
+        """Read a stored index; an unreadable or incompatible file gives an empty one."""
+        index = cls(threshold)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return index
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != INDEX_VERSION
+            or data.get("num_perm") != index.num_perm
+            or data.get("shingle_size") != index.shingle_size
+        ):
+            return index
+        for key, encoded in (data.get("signatures") or {}).items():
+            signature = _decode(encoded)
+            if len(signature) == index.num_perm:
+                index.add(key, signature)
+        index.dirty = False
+        return index
+
+    def save(self, path: Path) -> None:
+        """Write the signatures atomically (buckets are rebuilt on load)."""
+        data = {
+            "version": INDEX_VERSION,
+            "num_perm": self.num_perm,
+            "shingle_size": self.shingle_size,
+            "signatures": {key: _encode(self.signatures[key]) for key in sorted(self.signatures)},
+        }
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        with temp_path.open("w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=0)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+        self.dirty = False
+
+
+_VOCABULARY_SIZE = 5000
+
+
+def _synthetic_corpus(size: int, words: int, rng: random.Random) -> List[str]:
+    vocabulary = [f"w{index}" for index in range(_VOCABULARY_SIZE)]
+    return [" ".join(rng.choices(vocabulary, k=words)) for _ in range(size)]
+
+
+def _edit(text: str, rate: float, rng: random.Random) -> str:
+    """Replace about ``rate`` of the words, as a light rewrite would."""
+    words = text.split()
+    for _ in range(max(1, int(len(words) * rate))):
+        words[rng.randrange(len(words))] = f"x{rng.randrange(_VOCABULARY_SIZE)}"
+    return " ".join(words)
+
+
+def run_benchmark(size: int, queries: int, words: int, edit_rate: float, threshold: float, seed: int) -> None:
+    """Index a synthetic corpus, then query edited copies and unrelated texts."""
+    rng = random.Random(seed)
+    corpus = _synthetic_corpus(size, words, rng)
+    index = NearDuplicateIndex(threshold)
+    print(f"Corpus: {size} descriptions of {words} words; bands={index.bands} rows={index.rows}")
+
+    started = time.perf_counter()
+    for position, text in enumerate(corpus):
+        signature = index.signature(text)
+        if signature is not None:
+            index.add(str(position), signature)
+    build = time.perf_counter() - started
+    print(f"Build: {build:.1f}s ({build / size * 1e6:.0f} us per description)")
+
+    targets = [rng.randrange(size) for _ in range(queries)]
+    edited = [_edit(corpus[target], edit_rate, rng) for target in targets]
+    unrelated = _synthetic_corpus(queries, words, rng)
+
+    started = time.perf_counter()
+    found = 0
+    for target, text in zip(targets, edited):
+        match = index.query(index.signature(text))
+        found += bool(match and match[0] == str(target))
+    false_positives = sum(1 for text in unrelated if index.query(index.signature(text)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"Query: {elapsed / (2 * queries) * 1e6:.0f} us per item; recall {found / queries:.1%} "
+        f"at {edit_rate:.0%} edited words; false positives {false_positives / queries:.2%}"
+    )
+
+    # Pairwise baseline: one query against every signature, extrapolated.
+    sample = min(size, 2000)
+    probe = index.signature(edited[0])
+    signatures = list(index.signatures.values())[:sample]
+    started = time.perf_counter()
+    for signature in signatures:
+        similarity(probe, signature)
+    pairwise = (time.perf_counter() - started) / sample * size
+    print(f"Pairwise scan: ~{pairwise * 1e3:.0f} ms per item over {size} signatures")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Near-duplicate index tools.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    benchmark = subparsers.add_parser("benchmark", help="Benchmark the index on a synthetic corpus.")
+    benchmark.add_argument("--size", type=int, default=100_000, help="Number of indexed descriptions.")
+    benchmark.add_argument("--queries", type=int, default=1000, help="Number of edited and of unrelated queries.")
+    benchmark.add_argument("--words", type=int, default=150, help="Words per description.")
+    benchmark.add_argument("--edit-rate", type=float, default=0.03, help="Share of words replaced in queries.")
+    benchmark.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD)
+    benchmark.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    run_benchmark(args.size, args.queries, args.words, args.edit_rate, args.threshold, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""Long-running posting daemon that keeps a warm, Page-selected browser.
+
+``python post_content.py daemon`` starts Chrome once per job, logs in and
+switches to the Page, then keeps that session open. Posts fire at fixed
+daily slots (local time) plus a random delay of up to ``jitter`` seconds; at
+a slot only the feed check and the composer steps run.
+
+A monitor thread per job checks the browser every ``health_interval``
+seconds. A renderer that does not answer a trivial script within
+``response_timeout``, a process tree above ``rss_limit_mb``, a lost login or
+a session older than ``max_session_age`` gets the session recycled: the
+replacement is started and switched to the Page while the old one stays
+available, and only then swapped in. A failed post asks for a recycle too.
+After each successful post the refreshed session cookies are written back
+to the job's cookie bundle.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from selenium.common.exceptions import WebDriverException
+
+from content_queue import open_history, select_candidates
+from debug_snapshots import capture
+from facebook_flow import (
+    dismiss_notification_popup,
+    download_images,
+    harvest_cookies,
+    is_session_authenticated,
+    launch_browser,
+    load_cookies,
+    open_authenticated_session,
+    post_batch,
+    switch_to_page,
+)
+from history_store import PostHistory
+from jobs import AccountRateLimiter, PostJob, process_tree_rss_mb
+from posting_journal import PostingJournal
+from session_profile import discard_profile, profile_archive_path, save_profile
+from tracing import set_attribute, span, trace_run
+from vault import get_password
+
+DEFAULT_SLOTS = "09:00,21:00"
+DEFAULT_JITTER = 600.0
+DEFAULT_RSS_LIMIT_MB = 1200
+HEALTH_INTERVAL = 60.0
+RESPONSE_TIMEOUT = 10.0
+MAX_SESSION_AGE = 24 * 3600.0
+
+Slot = Tuple[int, int]
+
+
+@dataclass
+class DaemonConfig:
+    slots: List[Slot] = field(default_factory=lambda: parse_slots(DEFAULT_SLOTS))
+    jitter: float = DEFAULT_JITTER
+    rss_limit_mb: int = DEFAULT_RSS_LIMIT_MB
+    health_interval: float = HEALTH_INTERVAL
+    response_timeout: float = RESPONSE_TIMEOUT
+    max_session_age: float = MAX_SESSION_AGE
+
+
+def parse_slots(text: str) -> List[Slot]:
+    """Parse ``"HH:MM,HH:MM"`` into sorted ``(hour, minute)`` pairs."""
+    slots = []
+    for part in text.split(","):
+        try:
+            hour, minute = (int(value) for value in part.strip().split(":"))
+        except ValueError as exc:
+            raise ValueError(f"Invalid slot '{part.strip()}', expected HH:MM") from exc
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Invalid slot '{part.strip()}', expected HH:MM")
+        slots.append((hour, minute))
+    if not slots:
+        raise ValueError("At least one slot is required")
+    return sorted(set(slots))
+
+
+def next_slot(after: datetime, slots: Sequence[Slot]) -> datetime:
+    """Return the first slot time strictly after ``after``."""
+    for day in range(2):
+        date = (after + timedelta(days=day)).date()
+        for hour, minute in slots:
+            moment = datetime(date.year, date.month, date.day, hour, minute)
+            if moment > after:
+                return moment
+    raise ValueError("No slots configured")
+
+
+def sleep_until(moment: datetime) -> None:
+    """Sleep until the wall-clock ``moment``, re-checking the clock every minute."""
+    while True:
+        remaining = (moment - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 60))
+
+
+class WarmSession:
+    """A logged-in browser acting as the job's Page."""
+
+    def __init__(self, job: PostJob) -> None:
+        self.job = job
+        self.driver = None
+        self.profile_dir: Optional[Path] = None
+        self.started = time.monotonic()
+        self.posts = 0
+        self._probe = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"probe-{job.slug}")
+
+    def open(self) -> None:
+        """Start Chrome, log in and switch to the Page."""
+        with trace_run(self.job.name), span("daemon.warm_up"):
+            cookies = load_cookies(Path(self.job.cookies_file))
+            self.driver, self.profile_dir, restored = launch_browser(profile_archive_path(self.job.slug))
+            open_authenticated_session(self.driver, cookies, restored)
+            dismiss_notification_popup(self.driver)
+            if not switch_to_page(self.driver, self.job.page_name):
+                raise RuntimeError(f"Unable to switch to the Page '{self.job.page_name}'")
+        self.started = time.monotonic()
+        print(f"[{self.job.name}] Warm session ready.")
+
+    def check(self, config: DaemonConfig) -> Optional[str]:
+        """Return why the session should be recycled, or None when it is healthy."""
+        if self.driver is None:
+            return "not started"
+        if time.monotonic() - self.started > config.max_session_age:
+            return "maximum session age reached"
+        rss = process_tree_rss_mb(self.driver.service.process.pid)
+        if rss is not None and rss > config.rss_limit_mb:
+            return f"browser RSS {rss:.0f} MB above {config.rss_limit_mb} MB"
+
+        future = self._probe.submit(self._probe_page)
+        try:
+            authenticated = future.result(timeout=config.response_timeout)
+        except FutureTimeoutError:
+            return f"no response within {config.response_timeout:.0f}s"
+        except WebDriverException as exc:
+            return f"browser error: {exc.__class__.__name__}"
+        if not authenticated:
+            return "session logged out"
+        return None
+
+    def _probe_page(self) -> bool:
+        self.driver.execute_script("return document.readyState;")
+        # Chromedriver buffers performance log events until they are read.
+        self.driver.get_log("performance")
+        return is_session_authenticated(self.driver)
+
+    def post(
+        self,
+        candidates: Sequence[Dict[str, Any]],
+        image_paths: Sequence[Optional[Path]],
+        history: PostHistory,
+        journal: PostingJournal,
+        limiter: AccountRateLimiter,
+    ) -> int:
+        """Post from the idle session, checking the composer and Page context first."""
+        try:
+            posted = post_batch(
+                self.driver, self.job, candidates, image_paths, history, journal, limiter, reset_first=True
+            )
+        except WebDriverException:
+            capture(self.driver, "daemon_post")
+            raise
+        if posted:
+            harvest_cookies(self.driver, self.job)
+        self.posts += posted
+        return posted
+
+    def close(self) -> None:
+        """Quit Chrome and store the profile it leaves behind."""
+        self._probe.shutdown(wait=False)
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except WebDriverException as exc:
+                print(f"[{self.job.name}] Error while closing the browser: {exc.__class__.__name__}")
+        if self.profile_dir is not None:
+            # Chrome flushes its cookie store on exit, so archive after quit.
+            if self.posts:
+                try:
+                    save_profile(self.profile_dir, get_password(), profile_archive_path(self.job.slug))
+                except Exception as exc:
+                    print(f"Failed to save browser profile: {exc}")
+            discard_profile(self.profile_dir)
+        self.driver = None
+        self.profile_dir = None
+
+
+class SessionKeeper:
+    """Keep one warm session per job and replace it in the background when it degrades."""
+
+    def __init__(self, job: PostJob, config: DaemonConfig) -> None:
+        self.job = job
+        self.config = config
+        self.session: Optional[WarmSession] = None
+        self._lock = threading.Lock()  # Held while posting and while swapping sessions.
+        self._wake = threading.Event()
+        self._stopping = False
+        self._recycle_reason: Optional[str] = None
+        self._thread = threading.Thread(target=self._monitor, name=f"session-keeper-{job.slug}", daemon=True)
+
+    def _open_session(self) -> Optional[WarmSession]:
+        session = WarmSession(self.job)
+        try:
+            session.open()
+        except Exception as exc:
+            print(f"[{self.job.name}] Unable to start a warm session: {exc}")
+            session.close()
+            return None
+        return session
+
+    def start(self) -> None:
+        self.session = self._open_session()
+        self._thread.start()
+
+    def request_recycle(self, reason: str) -> None:
+        """Ask the monitor to replace the session as soon as possible."""
+        self._recycle_reason = reason
+        self._wake.set()
+
+    def recycle(self, reason: str) -> None:
+        """Start a replacement session, then swap it in and close the old one."""
+        print(f"[{self.job.name}] Recycling browser session: {reason}.")
+        replacement = self._open_session()
+        if replacement is None:
+            return
+        with self._lock:
+            previous, self.session = self.session, replacement
+        if previous is not None:
+            previous.close()
+
+    def _monitor(self) -> None:
+        while True:
+            self._wake.wait(self.config.health_interval)
+            self._wake.clear()
+            if self._stopping:
+                return
+            reason, self._recycle_reason = self._recycle_reason, None
+            if reason is None:
+                if not self._lock.acquire(blocking=False):
+                    continue  # A post is running; check next time.
+                try:
+                    reason = self.session.check(self.config) if self.session else "no session"
+                finally:
+                    self._lock.release()
+            if reason is not None:
+                self.recycle(reason)
+
+    @contextmanager
+    def acquire(self) -> Iterator[WarmSession]:
+        """Hold the session for a post; falls back to a cold start when none is ready."""
+        with self._lock:
+            if self.session is None:
+                print(f"[{self.job.name}] No warm session; starting one now.")
+                self.session = self._open_session()
+                if self.session is None:
+                    raise RuntimeError("Unable to start a browser session")
+            yield self.session
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout=self.config.response_timeout)
+        with self._lock:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
+
+
+def fire_slot(keeper: SessionKeeper, limiter: AccountRateLimiter) -> int:
+    """Post the job's pending items with its warm session; return the number posted."""
+    job = keeper.job
+    with trace_run(job.name):
+        set_attribute("daemon", True)
+        history = open_history(job)
+        journal = PostingJournal.for_job(job.slug)
+        journal.recover(history)
+        candidates = journal.resume_candidates(
+            select_candidates(history, job.max_posts, job.content_url, job.similarity_threshold),
+            history,
+            job.max_posts,
+        )
+        if not candidates:
+            print(f"[{job.name}] No new content available to post.")
+            return 0
+        image_paths = download_images(candidates)
+        with keeper.acquire() as session:
+            posted = session.post(candidates, image_paths, history, journal, limiter)
+        if posted < len(candidates):
+            keeper.request_recycle("posting failed")
+        print(f"[{job.name}] Posted {posted} item(s).")
+        return posted
+
+
+def run_daemon(jobs: Sequence[PostJob], config: DaemonConfig, limiter: AccountRateLimiter) -> None:
+    """Keep warm sessions for ``jobs`` and post at every slot until interrupted."""
+    keepers = [SessionKeeper(job, config) for job in jobs]
+    for keeper in keepers:
+        keeper.start()
+
+    rng = random.Random()
+    slot = datetime.now()
+    try:
+        while True:
+            slot = next_slot(max(slot, datetime.now()), config.slots)
+            fire_at = slot + timedelta(seconds=rng.uniform(0, config.jitter))
+            print(f"Next post slot {slot:%Y-%m-%d %H:%M}, firing at {fire_at:%H:%M:%S}.")
+            sleep_until(fire_at)
+            for keeper in keepers:
+                try:
+                    fire_slot(keeper, limiter)
+                except Exception as exc:
+                    print(f"[{keeper.job.name}] Slot failed: {exc}")
+                    keeper.request_recycle("slot failed")
+    except KeyboardInterrupt:
+        print("Stopping the posting daemon.")
+    finally:
+        for keeper in keepers:
+            keeper.stop()
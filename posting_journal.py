@@ -0,0 +1,174 @@
+"""Write-ahead journal of the posting phases for the current candidate.
+
+Before each step of a post, the candidate and the phase it has reached are
+written to ``.cache/journal/<job>.json`` (fsync + rename, so the file is
+always either the old or the new state). Phases, in order::
+
+    fetched -> image_ready -> composer_open -> text_entered
+            -> media_uploaded -> publish_clicked -> posted
+
+``publish_clicked`` is written *before* the click. A run that dies at or
+after that point may already have published, so on restart the entry is
+recorded in the history instead of being posted again. A run that dies
+earlier leaves a resumable candidate: it is put first in the next run's
+queue and its image comes straight from the image cache.
+"""
+from __future__ import annotations
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from history_store import PostHistory, content_digest
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+JOURNAL_DIR = CACHE_DIR / "journal"
+PHASES = (
+    "fetched",
+    "image_ready",
+    "composer_open",
+    "text_entered",
+    "media_uploaded",
+    "publish_clicked",
+    "posted",
+)
+# From this phase on the post may be live; never publish the entry again.
+UNSAFE_PHASE = "publish_clicked"
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _write_atomic(path: Path, data: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(path.suffix + ".tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        json.dump(data, handle, ensure_ascii=False, indent=2)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself.
+        directory = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+class PostingJournal:
+    """Phase journal for one job; holds at most one in-flight candidate."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.entry: Optional[Dict[str, Any]] = self._load()
+
+    @classmethod
+    def for_job(cls, slug: str, journal_dir: Optional[Path] = None) -> "PostingJournal":
+        return cls((journal_dir or JOURNAL_DIR) / f"{slug}.json")
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not isinstance(data, dict) or data.get("phase") not in PHASES:
+            return None
+        return data
+
+    @property
+    def phase(self) -> Optional[str]:
+        return self.entry.get("phase") if self.entry else None
+
+    def is_unsafe(self) -> bool:
+        """True when the journaled candidate may already have been published."""
+        return self.phase is not None and PHASES.index(self.phase) >= PHASES.index(UNSAFE_PHASE)
+
+    def begin(self, candidate: Dict[str, Any], image_path: Optional[Path] = None) -> None:
+        """Start journaling ``candidate``; keeps the attempt count when resuming it."""
+        description = candidate.get("description", "").strip()
+        digest = content_digest(description)
+        attempts = self.entry.get("attempts", 0) if self.entry and self.entry.get("digest") == digest else 0
+        self.entry = {
+            "digest": digest,
+            "candidate": {key: candidate.get(key, "") for key in ("title", "description", "image")},
+            "phase": "fetched",
+            "attempts": attempts + 1,
+            "started_at": _now_iso(),
+            "updated_at": _now_iso(),
+        }
+        _write_atomic(self.path, self.entry)
+        if image_path is not None:
+            self.advance("image_ready", image_path=str(image_path))
+
+    def advance(self, phase: str, **details: Any) -> None:
+        """Record that the current candidate reached ``phase``."""
+        if self.entry is None:
+            return
+        self.entry.update(details, phase=phase, updated_at=_now_iso())
+        _write_atomic(self.path, self.entry)
+
+    def rewind(self, reason: str) -> None:
+        """Return to the last phase that survives a new browser session.
+
+        An entry that may already be published is left for ``recover``.
+        """
+        if self.entry is None:
+            return
+        if self.is_unsafe():
+            self.advance(self.phase, last_error=reason)
+            return
+        phase = "image_ready" if self.entry.get("image_path") else "fetched"
+        self.advance(phase, last_error=reason)
+
+    def clear(self) -> None:
+        """Forget the current candidate (it is recorded in the history)."""
+        self.entry = None
+        self.path.unlink(missing_ok=True)
+
+    def recover(self, history: PostHistory) -> Optional[str]:
+        """Settle an entry left by a previous run; return what was done.
+
+        Entries that may have been published are written to the history
+        (with the post ID if the publish response was seen) and cleared.
+        """
+        if self.entry is None:
+            return None
+        candidate = self.entry.get("candidate", {})
+        if history.has_posted(candidate.get("description", "")):
+            self.clear()
+            return "already_recorded"
+        if not self.is_unsafe():
+            return "resumable"
+
+        history.append(
+            {
+                **candidate,
+                "post_id": self.entry.get("post_id"),
+                "confirmation": "network" if self.phase == "posted" else "journal",
+            }
+        )
+        print(
+            f"Recovered '{candidate.get('title', '').strip()}' from the posting journal "
+            f"(phase {self.phase}); recorded without posting again."
+        )
+        self.clear()
+        return "recorded"
+
+    def resume_candidates(
+        self, pending: Sequence[Dict[str, Any]], history: PostHistory, limit: int
+    ) -> List[Dict[str, Any]]:
+        """Put the journaled candidate (if still pending) ahead of ``pending``."""
+        if self.entry is None or self.is_unsafe():
+            return list(pending)[:limit]
+        candidate = self.entry.get("candidate", {})
+        description = candidate.get("description", "").strip()
+        if not description or history.has_posted(description):
+            return list(pending)[:limit]
+        print(f"Resuming '{candidate.get('title', '').strip()}' from the posting journal (phase {self.phase}).")
+        current = next((item for item in pending if item.get("description", "").strip() == description), candidate)
+        rest = [item for item in pending if item is not current]
+        return ([dict(current)] + rest)[:limit]
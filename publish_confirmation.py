@@ -0,0 +1,215 @@
+"""Confirm a post by watching the composer's publish request.
+
+Chrome's performance log carries the DevTools ``Network.*`` events for every
+request. ``PublishMonitor`` drains the log right before "Post" is clicked,
+then watches for the GraphQL request whose friendly name marks a story
+creation. Once that request finishes, the response body is read with
+``Network.getResponseBody`` and the created post ID is extracted. The flow
+can return as soon as the response arrives instead of waiting for the
+dialog and network to settle. The driver must be started with the
+``performance`` log enabled (``lean_browser.PERFORMANCE_LOG_CAPABILITY``).
+"""
+from __future__ import annotations
+
+import base64
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+
+from tracing import set_attribute, span
+
+PUBLISH_URL_PATTERN = re.compile(r"/api/graphql/?(\?|$)")
+PUBLISH_FRIENDLY_NAMES = ("ComposerStoryCreateMutation",)
+PUBLISH_TIMEOUT = 30
+POLL_INTERVAL = 0.2
+# Keys under which Facebook responses carry the ID of a created story.
+_POST_ID_KEYS = ("post_id", "story_id", "legacy_story_hideable_id")
+_POST_ID_PATTERN = re.compile(r'"(?:post_id|story_id)"\s*:\s*"?(\d+)')
+
+
+@dataclass
+class PublishResult:
+    """Outcome of the publish request, as seen on the network."""
+
+    observed: bool
+    status: Optional[int] = None
+    post_id: Optional[str] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """True when the post was created; a post ID counts even next to an error entry."""
+        if not self.observed:
+            return False
+        if self.post_id:
+            return True
+        return self.status is not None and 200 <= self.status < 300 and not self.error
+
+    @property
+    def rejected(self) -> bool:
+        """True when Facebook answered without creating a post.
+
+        A request that failed or timed out before its response arrived is
+        neither ok nor rejected: the post may exist.
+        """
+        if not self.observed or self.ok or self.status is None:
+            return False
+        return bool(self.error) or not 200 <= self.status < 300
+
+
+def _iter_json_documents(body: str) -> Iterator[Any]:
+    """Yield the JSON documents in a (possibly multi-part) GraphQL response."""
+    body = body.strip()
+    if body.startswith("for (;;);"):
+        body = body[len("for (;;);"):]
+    for line in body.splitlines() or [body]:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+
+def _find_post_id(document: Any) -> Optional[str]:
+    if isinstance(document, dict):
+        data = document.get("data")
+        story_create = data.get("story_create") if isinstance(data, dict) else None
+        story = story_create.get("story") if isinstance(story_create, dict) else None
+        if isinstance(story, dict) and story.get("id"):
+            return str(story["id"])
+        for key in _POST_ID_KEYS:
+            if isinstance(document.get(key), (str, int)) and document[key]:
+                return str(document[key])
+        values: Sequence[Any] = list(document.values())
+    elif isinstance(document, list):
+        values = document
+    else:
+        return None
+    for value in values:
+        found = _find_post_id(value)
+        if found:
+            return found
+    return None
+
+
+def parse_publish_response(body: str) -> Dict[str, Optional[str]]:
+    """Return ``{"post_id", "error"}`` extracted from a publish response body."""
+    post_id: Optional[str] = None
+    error: Optional[str] = None
+    for document in _iter_json_documents(body):
+        if isinstance(document, dict) and document.get("errors") and not error:
+            first = document["errors"][0] if isinstance(document["errors"], list) else document["errors"]
+            error = str(first.get("message") if isinstance(first, dict) else first)[:300]
+        post_id = post_id or _find_post_id(document)
+    if post_id is None:
+        match = _POST_ID_PATTERN.search(body)
+        if match:
+            post_id = match.group(1)
+    return {"post_id": post_id, "error": error}
+
+
+class PublishMonitor:
+    """Watch the performance log for the composer's publish request."""
+
+    def __init__(self, driver: webdriver.Chrome, friendly_names: Sequence[str] = PUBLISH_FRIENDLY_NAMES) -> None:
+        self.driver = driver
+        self.friendly_names = tuple(friendly_names)
+        self.available = True
+        self._request_id: Optional[str] = None
+        self._status: Optional[int] = None
+
+    def _read_events(self) -> List[Dict[str, Any]]:
+        try:
+            entries = self.driver.get_log("performance")
+        except (WebDriverException, AttributeError):
+            self.available = False
+            return []
+        events = []
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, json.JSONDecodeError):
+                continue
+            if message.get("method", "").startswith("Network."):
+                events.append(message)
+        return events
+
+    def arm(self) -> None:
+        """Discard events logged so far; call right before clicking "Post"."""
+        self._read_events()
+        self._request_id = None
+        self._status = None
+
+    def _post_data(self, request_id: str, request: Dict[str, Any]) -> str:
+        if request.get("postData"):
+            return request["postData"]
+        if not request.get("hasPostData"):
+            return ""
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getRequestPostData", {"requestId": request_id})
+        except WebDriverException:
+            return ""
+        return response.get("postData", "")
+
+    def _is_publish_request(self, request_id: str, request: Dict[str, Any]) -> bool:
+        if request.get("method") != "POST" or not PUBLISH_URL_PATTERN.search(request.get("url", "")):
+            return False
+        headers = {key.lower(): value for key, value in (request.get("headers") or {}).items()}
+        if headers.get("x-fb-friendly-name") in self.friendly_names:
+            return True
+        post_data = self._post_data(request_id, request)
+        return any(name in post_data for name in self.friendly_names)
+
+    def _result(self, started: float, **values: Any) -> PublishResult:
+        result = PublishResult(elapsed=time.perf_counter() - started, **values)
+        set_attribute("observed", result.observed)
+        set_attribute("status", result.status)
+        set_attribute("post_id", result.post_id)
+        return result
+
+    def wait(self, timeout: float = PUBLISH_TIMEOUT) -> PublishResult:
+        """Wait for the publish response and return what it reported."""
+        started = time.perf_counter()
+        deadline = started + timeout
+        with span("wait.publish_response"):
+            while time.perf_counter() < deadline:
+                for event in self._read_events():
+                    params = event.get("params", {})
+                    method = event["method"]
+                    request_id = params.get("requestId")
+                    if self._request_id is None:
+                        if method == "Network.requestWillBeSent" and self._is_publish_request(
+                            request_id, params.get("request", {})
+                        ):
+                            self._request_id = request_id
+                        continue
+                    if request_id != self._request_id:
+                        continue
+                    if method == "Network.responseReceived":
+                        self._status = int(params.get("response", {}).get("status", 0))
+                    elif method == "Network.loadingFailed":
+                        return self._result(started, observed=True, error=params.get("errorText", "request failed"))
+                    elif method == "Network.loadingFinished":
+                        return self._result(started, observed=True, status=self._status, **self._response_details())
+                if not self.available:
+                    break
+                time.sleep(POLL_INTERVAL)
+            return self._result(started, observed=self._request_id is not None, status=self._status)
+
+    def _response_details(self) -> Dict[str, Optional[str]]:
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": self._request_id})
+        except WebDriverException:
+            return {"post_id": None, "error": None}
+        body = response.get("body", "")
+        if response.get("base64Encoded"):
+            body = base64.b64decode(body).decode("utf-8", "replace")
+        return parse_publish_response(body)
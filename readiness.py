@@ -0,0 +1,198 @@
+"""Event-driven readiness checks for the Facebook posting flow.
+
+Each helper waits on a concrete signal in the page (a rendered thumbnail, an
+enabled button, a closed dialog, an idle network) instead of sleeping for a
+fixed amount of time. Every wait is bounded by a budget learned from past
+waits (``adaptive_timeouts``), starting from ``READINESS_TIMEOUTS``, unless
+the caller supplies one explicitly.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import (
+    JavascriptException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from adaptive_timeouts import record_wait, timeout_for
+from tracing import set_attribute, span
+
+# Upper bounds (seconds) for each readiness signal. Adjust per environment.
+READINESS_TIMEOUTS: Dict[str, float] = {
+    "menu": 10,
+    "file_input": 10,
+    "upload": 60,
+    "next": 20,
+    "post": 20,
+    "dialog_closed": 60,
+    "network_idle": 30,
+}
+POLL_INTERVAL = 0.25
+NETWORK_QUIET_PERIOD = 1.0
+
+COMPOSER_DIALOG_SELECTOR = "div[role='dialog'] form"
+MENU_SELECTOR = "div[role='menu'], div[role='dialog'] [role='menuitem'], div[role='dialog'] a[role='link']"
+
+# Thumbnails rendered by the composer are larger than the avatar shown next to
+# the text field, so a minimum size filters the avatar out.
+_UPLOAD_READY_SCRIPT = """
+const dialog = document.querySelector(arguments[0]) || document.querySelector("div[role='dialog']");
+if (!dialog) { return false; }
+if (dialog.querySelector("[role='progressbar']")) { return false; }
+return Array.from(dialog.querySelectorAll("img")).some(
+    (img) => img.complete && img.naturalWidth > 0 && img.getBoundingClientRect().width >= arguments[1]
+);
+"""
+UPLOAD_THUMBNAIL_MIN_WIDTH = 60
+
+# Counts in-flight fetch/XHR requests so the page can report when it is idle.
+_NETWORK_TRACKER_SCRIPT = """
+if (window.__ffNetwork) { return true; }
+const state = { pending: 0, lastChange: Date.now() };
+window.__ffNetwork = state;
+const begin = () => { state.pending += 1; state.lastChange = Date.now(); };
+const end = () => { state.pending = Math.max(0, state.pending - 1); state.lastChange = Date.now(); };
+const originalFetch = window.fetch;
+if (originalFetch) {
+    window.fetch = function () {
+        begin();
+        return originalFetch.apply(this, arguments).finally(end);
+    };
+}
+const originalSend = XMLHttpRequest.prototype.send;
+XMLHttpRequest.prototype.send = function () {
+    begin();
+    this.addEventListener("loadend", end, { once: true });
+    return originalSend.apply(this, arguments);
+};
+return true;
+"""
+_NETWORK_STATE_SCRIPT = """
+const state = window.__ffNetwork;
+if (!state) { return null; }
+return { pending: state.pending, idleFor: (Date.now() - state.lastChange) / 1000 };
+"""
+
+
+def get_timeout(name: str, timeout: Optional[float] = None) -> float:
+    """Return the explicit timeout or the learned budget for ``name``.
+
+    ``READINESS_TIMEOUTS`` is the default until enough waits are recorded.
+    """
+    if timeout is not None:
+        return timeout
+    return timeout_for(f"wait.{name}", READINESS_TIMEOUTS[name])
+
+
+def wait_until(
+    driver: webdriver.Chrome,
+    condition: Callable[[webdriver.Chrome], Any],
+    name: str,
+    timeout: Optional[float] = None,
+) -> bool:
+    """Poll ``condition`` until it is truthy; return False once the bound expires."""
+    with span(f"wait.{name}"):
+        started = time.monotonic()
+        try:
+            WebDriverWait(
+                driver,
+                get_timeout(name, timeout),
+                poll_frequency=POLL_INTERVAL,
+                ignored_exceptions=(StaleElementReferenceException, JavascriptException),
+            ).until(condition)
+            ready = True
+        except TimeoutException:
+            ready = False
+        set_attribute("ready", ready)
+        # A miss under a caller's own short bound says nothing about the step.
+        if ready or timeout is None:
+            record_wait(f"wait.{name}", time.monotonic() - started, ready, READINESS_TIMEOUTS[name])
+        return ready
+
+
+def wait_for_menu(driver: webdriver.Chrome, timeout: Optional[float] = None) -> bool:
+    """Wait until the account menu has rendered its entries."""
+    return wait_until(
+        driver,
+        lambda d: any(el.is_displayed() for el in d.find_elements(By.CSS_SELECTOR, MENU_SELECTOR)),
+        "menu",
+        timeout,
+    )
+
+
+def wait_for_file_input(driver: webdriver.Chrome, timeout: Optional[float] = None) -> bool:
+    """Wait until a file input is attached to the document."""
+    return wait_until(
+        driver,
+        lambda d: d.find_elements(By.XPATH, "//input[@type='file']"),
+        "file_input",
+        timeout,
+    )
+
+
+def wait_for_upload_complete(driver: webdriver.Chrome, timeout: Optional[float] = None) -> bool:
+    """Wait until the composer shows a rendered thumbnail and no progress bar."""
+    return wait_until(
+        driver,
+        lambda d: d.execute_script(
+            _UPLOAD_READY_SCRIPT, COMPOSER_DIALOG_SELECTOR, UPLOAD_THUMBNAIL_MIN_WIDTH
+        ),
+        "upload",
+        timeout,
+    )
+
+
+def _button_enabled(driver: webdriver.Chrome, xpath: str) -> bool:
+    elements = driver.find_elements(By.XPATH, xpath)
+    if not elements or not elements[0].is_displayed():
+        return False
+    button = elements[0].find_elements(By.XPATH, "./ancestor-or-self::*[@role='button'][1]")
+    target = button[0] if button else elements[0]
+    return target.get_attribute("aria-disabled") != "true" and target.is_enabled()
+
+
+def wait_for_button_enabled(
+    driver: webdriver.Chrome, xpath: str, timeout: Optional[float] = None, name: str = "next"
+) -> bool:
+    """Wait until the button containing the XPath target is visible and not disabled."""
+    return wait_until(driver, lambda d: _button_enabled(d, xpath), name, timeout)
+
+
+def wait_for_dialog_closed(driver: webdriver.Chrome, timeout: Optional[float] = None) -> bool:
+    """Wait until the composer dialog has been removed or hidden."""
+    return wait_until(
+        driver,
+        lambda d: not any(
+            el.is_displayed() for el in d.find_elements(By.CSS_SELECTOR, COMPOSER_DIALOG_SELECTOR)
+        ),
+        "dialog_closed",
+        timeout,
+    )
+
+
+def install_network_tracker(driver: webdriver.Chrome) -> None:
+    """Start counting in-flight fetch/XHR requests on the current document."""
+    driver.execute_script(_NETWORK_TRACKER_SCRIPT)
+
+
+def wait_for_network_idle(
+    driver: webdriver.Chrome,
+    timeout: Optional[float] = None,
+    quiet_period: float = NETWORK_QUIET_PERIOD,
+) -> bool:
+    """Wait until no tracked request is pending for ``quiet_period`` seconds."""
+
+    def _idle(d: webdriver.Chrome) -> bool:
+        state = d.execute_script(_NETWORK_STATE_SCRIPT)
+        if state is None:
+            # Tracker was not installed (or the page navigated); nothing to wait for.
+            return True
+        return state["pending"] == 0 and state["idleFor"] >= quiet_period
+
+    return wait_until(driver, _idle, "network_idle", timeout)
@@ -0,0 +1,118 @@
+"""Step-level retries with bounded exponential backoff for the posting flow.
+
+A late menu, a click swallowed by an overlay or a stale element used to end
+the run, leaving recovery to ``retry.yml`` re-running the whole workflow
+(checkout, install, Chrome start, login) up to an hour later. ``retry_step``
+retries just the failing step: it waits ``base_delay * factor ** n`` (capped
+at ``max_delay``, with jitter) and runs the next recovery action of the step
+(e.g. press Escape, then reopen the composer, then re-navigate the Page)
+before trying again. Attempts per step are taken from ``STEP_POLICIES``.
+"""
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type, TypeVar
+
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from tracing import increment_attribute, set_attribute
+
+T = TypeVar("T")
+
+# Errors that say "not yet" or "not here" rather than "the browser is gone".
+TRANSIENT_ERRORS: Tuple[Type[BaseException], ...] = (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often a step is tried and how long to wait between attempts."""
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    factor: float = 2.0
+    max_delay: float = 5.0
+    jitter: float = 0.25
+
+    def delay(self, retry: int) -> float:
+        """Return the pause before retry number ``retry`` (0-based)."""
+        delay = min(self.max_delay, self.base_delay * self.factor ** retry)
+        return min(self.max_delay, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+DEFAULT_POLICY = RetryPolicy()
+# Per-step policies. Outer steps retry less since their inner steps already did.
+STEP_POLICIES: Dict[str, RetryPolicy] = {
+    "switch_to_page": RetryPolicy(attempts=2, base_delay=1.0),
+    "open_profile_menu": RetryPolicy(attempts=3),
+    "select_page": RetryPolicy(attempts=3),
+    "open_composer": RetryPolicy(attempts=3, base_delay=1.0),
+    "enter_text": RetryPolicy(attempts=3),
+    "upload_media": RetryPolicy(attempts=3, base_delay=1.0),
+    "click_next": RetryPolicy(attempts=3),
+    "locate_post": RetryPolicy(attempts=3),
+}
+
+
+def _accept_any(_: Any) -> bool:
+    return True
+
+
+def retry_step(
+    name: str,
+    action: Callable[[], T],
+    recoveries: Sequence[Callable[[], Any]] = (),
+    accept: Callable[[T], bool] = _accept_any,
+    policy: Optional[RetryPolicy] = None,
+    retry_on: Tuple[Type[BaseException], ...] = TRANSIENT_ERRORS,
+) -> T:
+    """Run ``action`` until it succeeds or the step's attempts are used up.
+
+    An attempt fails when it raises one of ``retry_on`` or when ``accept``
+    rejects its result. Before retry ``n`` the ``n``-th recovery action runs
+    (the last one is repeated). After the final attempt the last error is
+    re-raised, or the last rejected result is returned.
+    """
+    policy = policy or STEP_POLICIES.get(name, DEFAULT_POLICY)
+    attempts = max(1, policy.attempts)
+    for attempt in range(1, attempts):
+        try:
+            result = action()
+        except retry_on as exc:
+            reason = exc.__class__.__name__
+        else:
+            if accept(result):
+                if attempt > 1:
+                    set_attribute(f"attempts.{name}", attempt)
+                return result
+            reason = f"result {result!r}"
+
+        delay = policy.delay(attempt - 1)
+        increment_attribute("step_retries")
+        print(f"Step '{name}' failed ({reason}, attempt {attempt}/{attempts}); retrying in {delay:.1f}s.")
+        time.sleep(delay)
+        if recoveries:
+            recover = recoveries[min(attempt, len(recoveries)) - 1]
+            try:
+                recover()
+            except WebDriverException as exc:
+                print(f"Recovery for step '{name}' failed: {exc.__class__.__name__}")
+
+    result = action()
+    if attempts > 1:
+        set_attribute(f"attempts.{name}", attempts)
+    return result
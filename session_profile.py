@@ -0,0 +1,96 @@
+"""Persistent Chrome profile stored encrypted at rest.
+
+Between runs the Chrome user-data-dir is kept as a single encrypted tarball
+(``.cache/chrome-profile.enc``). At startup it is decrypted into a fresh
+directory that Chrome uses directly, so the session cookies are already in
+place before the first navigation. After a successful run the profile is
+archived again without the disk caches, which are large and useless on an
+ephemeral runner.
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from vault import decrypt_payload, encrypt_payload
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+PROFILE_ARCHIVE = CACHE_DIR / "chrome-profile.enc"
+# Profile sub-directories that only hold disposable caches.
+EXCLUDED_PROFILE_DIRS = {
+    "Cache",
+    "Code Cache",
+    "GPUCache",
+    "GrShaderCache",
+    "ShaderCache",
+    "GraphiteDawnCache",
+    "CacheStorage",
+    "Crashpad",
+}
+
+
+def profile_archive_path(slug: Optional[str] = None) -> Path:
+    """Return the archive used for a job's profile; the default job keeps the base path."""
+    if not slug or slug == "default":
+        return PROFILE_ARCHIVE
+    return PROFILE_ARCHIVE.with_name(f"chrome-profile.{slug}.enc")
+
+
+def _exclude(tarinfo: tarfile.TarInfo) -> Optional[tarfile.TarInfo]:
+    parts = Path(tarinfo.name).parts
+    if any(part in EXCLUDED_PROFILE_DIRS for part in parts):
+        return None
+    # Chrome's singleton lock files point at the previous host/process.
+    if parts and parts[-1].startswith("Singleton"):
+        return None
+    return tarinfo
+
+
+def restore_profile(password: str, archive: Path = PROFILE_ARCHIVE) -> Optional[Path]:
+    """Decrypt the archived profile into a new directory; None if unavailable."""
+    if not archive.exists():
+        return None
+
+    try:
+        payload = json.loads(archive.read_text(encoding="utf-8"))
+        data = decrypt_payload(payload, password)
+    except Exception as exc:
+        print(f"Stored browser profile could not be decrypted ({exc}); starting fresh.")
+        return None
+
+    profile_dir = Path(tempfile.mkdtemp(prefix="face_flow_profile_"))
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        tar.extractall(profile_dir, filter="data")
+    print(f"Restored browser profile into {profile_dir}")
+    return profile_dir
+
+
+def save_profile(profile_dir: Path, password: str, archive: Path = PROFILE_ARCHIVE) -> None:
+    """Archive and encrypt the profile directory, replacing the stored copy atomically."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        tar.add(profile_dir, arcname=".", filter=_exclude)
+
+    payload = encrypt_payload(buffer.getvalue(), password)
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = archive.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(temp_path, archive)
+    print(f"Saved encrypted browser profile to {archive}")
+
+
+def discard_profile(profile_dir: Optional[Path]) -> None:
+    """Remove a decrypted profile directory from disk."""
+    if profile_dir is not None:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def create_profile_dir() -> Path:
+    """Return a new, empty user-data-dir for a first run."""
+    return Path(tempfile.mkdtemp(prefix="face_flow_profile_"))
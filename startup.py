@@ -0,0 +1,152 @@
+"""Concurrent startup orchestration for the posting flow.
+
+Independent startup stages (browser launch, cookie decryption, feed fetch,
+image prefetch) run on a thread pool. A stage starts as soon as the stages it
+depends on have finished. When any stage fails, stages that have not started
+are cancelled, results from completed stages are cleaned up, and the original
+error is re-raised. Per-stage timings are recorded so the critical path can
+be reported.
+"""
+from __future__ import annotations
+
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from tracing import span
+
+
+@dataclass
+class Stage:
+    """A unit of startup work.
+
+    ``func`` receives a mapping with the results of the stages listed in
+    ``depends``. ``cleanup`` is called with the stage result if the pipeline
+    fails after the stage completed (e.g. to quit a launched browser).
+    """
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends: Sequence[str] = ()
+    cleanup: Optional[Callable[[Any], None]] = None
+
+
+@dataclass
+class StageTiming:
+    name: str
+    start: float
+    end: float
+    status: str = "ok"
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class PipelineResult:
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: List[StageTiming] = field(default_factory=list)
+    wall_time: float = 0.0
+
+
+class PipelineError(RuntimeError):
+    """Raised when a startup stage fails; carries the timings collected so far."""
+
+    def __init__(self, stage: str, error: BaseException, timings: List[StageTiming]) -> None:
+        super().__init__(f"Startup stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+        self.timings = timings
+
+
+def _validate(stages: Sequence[Stage]) -> None:
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError("Startup stage names must be unique")
+    for stage in stages:
+        missing = [dep for dep in stage.depends if dep not in names]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stage(s): {missing}")
+
+
+def run_pipeline(stages: Sequence[Stage], max_workers: Optional[int] = None) -> PipelineResult:
+    """Run the stages concurrently, honouring dependencies."""
+    _validate(stages)
+    origin = time.perf_counter()
+    result = PipelineResult()
+    pending = {stage.name: stage for stage in stages}
+    running: Dict[Future, Tuple[Stage, float]] = {}
+    failure: Optional[Tuple[str, BaseException]] = None
+
+    def _run(stage: Stage, inputs: Dict[str, Any]) -> Any:
+        with span(f"startup.{stage.name}"):
+            return stage.func(inputs)
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as executor:
+        while pending or running:
+            if failure is None:
+                for name, stage in list(pending.items()):
+                    if all(dep in result.results for dep in stage.depends):
+                        inputs = {dep: result.results[dep] for dep in stage.depends}
+                        started = time.perf_counter() - origin
+                        # Carry the caller's context so stage spans join the current trace.
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, _run, stage, inputs)] = (stage, started)
+                        del pending[name]
+            elif pending:
+                now = time.perf_counter() - origin
+                for name in pending:
+                    result.timings.append(StageTiming(name, now, now, "cancelled"))
+                pending.clear()
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Startup stages have circular dependencies: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, started = running.pop(future)
+                finished = time.perf_counter() - origin
+                error = future.exception()
+                if error is None:
+                    result.results[stage.name] = future.result()
+                    result.timings.append(StageTiming(stage.name, started, finished))
+                else:
+                    result.timings.append(StageTiming(stage.name, started, finished, "failed"))
+                    if failure is None:
+                        failure = (stage.name, error)
+
+    result.wall_time = time.perf_counter() - origin
+
+    if failure is not None:
+        for stage in stages:
+            if stage.cleanup and stage.name in result.results:
+                try:
+                    stage.cleanup(result.results[stage.name])
+                except Exception as exc:  # Cleanup must not mask the original error.
+                    print(f"Cleanup for stage '{stage.name}' failed: {exc}")
+        raise PipelineError(failure[0], failure[1], result.timings) from failure[1]
+
+    return result
+
+
+def format_timing_report(timings: Sequence[StageTiming], wall_time: Optional[float] = None) -> str:
+    """Render a per-stage timing table ordered by start time."""
+    rows = sorted(timings, key=lambda timing: (timing.start, timing.name))
+    width = max([len(timing.name) for timing in rows] + [5])
+    lines = [f"{'stage'.ljust(width)}  {'start':>7}  {'end':>7}  {'took':>7}  status"]
+    for timing in rows:
+        lines.append(
+            f"{timing.name.ljust(width)}  {timing.start:7.2f}  {timing.end:7.2f}  "
+            f"{timing.duration:7.2f}  {timing.status}"
+        )
+    total = sum(timing.duration for timing in rows)
+    critical = max((timing.end for timing in rows), default=0.0)
+    if wall_time is not None:
+        critical = wall_time
+    lines.append(f"Sequential sum: {total:.2f}s, critical path: {critical:.2f}s")
+    return "\n".join(lines)
@@ -0,0 +1,302 @@
+"""Lightweight per-phase tracing with a JSONL timing log.
+
+Steps are wrapped in spans (``with span("name"):`` or ``@traced()``). Spans
+nest through context variables, so they follow the thread that runs them and
+can be carried into worker threads with ``contextvars.copy_context``. A
+driver passed through ``instrument_driver`` counts every WebDriver command
+(and the time spent in it) against the innermost open span, and records page
+navigations as spans of their own.
+
+When a run finishes, each span is appended as one JSON line to the trace
+log. ``python tracing.py summarize`` prints p50/p95 durations per span name
+across the recorded runs.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+TRACE_FILE = CACHE_DIR / "traces.jsonl"
+# Once the log grows past this size, only the newest half is kept.
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+NAVIGATION_COMMANDS = {"get", "refresh", "goBack", "goForward"}
+
+F = TypeVar("F", bound=Callable[..., Any])
+# Serialises appends from concurrently finishing runs (worker pool jobs).
+_write_lock = threading.Lock()
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    started_at: str
+    start: float
+    duration: Optional[float] = None
+    status: str = "ok"
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    webdriver_calls: int = 0
+    webdriver_time: float = 0.0
+
+    def to_record(self, run: "TraceRun") -> Dict[str, Any]:
+        record = {
+            "run_id": run.run_id,
+            "job": run.job,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": round(self.duration or 0.0, 4),
+            "status": self.status,
+        }
+        if self.webdriver_calls:
+            record["webdriver_calls"] = self.webdriver_calls
+            record["webdriver_time"] = round(self.webdriver_time, 4)
+        if self.attributes:
+            record["attributes"] = self.attributes
+        return record
+
+
+@dataclass
+class TraceRun:
+    job: str
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    spans: List[Span] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_current_run: ContextVar[Optional[TraceRun]] = ContextVar("trace_run", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as a child of the current span."""
+    parent = _current_span.get()
+    current = Span(
+        name=name,
+        span_id=uuid.uuid4().hex[:12],
+        parent_id=parent.span_id if parent else None,
+        started_at=_now_iso(),
+        start=time.perf_counter(),
+        attributes=dict(attributes),
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "error"
+        current.attributes.setdefault("error", f"{exc.__class__.__name__}: {exc}"[:300])
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current_span.reset(token)
+        run = _current_run.get()
+        if run is not None:
+            with run.lock:
+                run.spans.append(current)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator that runs the function inside a span (named after it by default)."""
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def set_attribute(key: str, value: Any) -> None:
+    """Attach an attribute (e.g. the matched locator) to the current span."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = value
+
+
+def increment_attribute(key: str, amount: int = 1) -> None:
+    """Increase a numeric attribute (e.g. a retry counter) on the current span."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes[key] = current.attributes.get(key, 0) + amount
+
+
+def current_context(recent: int = 8) -> Dict[str, Any]:
+    """Describe the current run, the open span and the last finished spans.
+
+    Used to attach trace context to debug artifacts such as DOM snapshots.
+    """
+    run = _current_run.get()
+    current = _current_span.get()
+    finished: List[Dict[str, Any]] = []
+    if run is not None:
+        with run.lock:
+            finished = [item.to_record(run) for item in run.spans[-recent:]]
+    return {
+        "run_id": run.run_id if run else None,
+        "job": run.job if run else None,
+        "span": current.name if current else None,
+        "span_id": current.span_id if current else None,
+        "recent_spans": finished,
+    }
+
+
+def instrument_driver(driver: Any) -> Any:
+    """Count WebDriver commands per span and trace navigations."""
+    original_execute = driver.execute
+
+    def execute(driver_command: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        if driver_command in NAVIGATION_COMMANDS:
+            with span(f"webdriver.{driver_command}"):
+                return _timed_execute(original_execute, driver_command, params)
+        return _timed_execute(original_execute, driver_command, params)
+
+    driver.execute = execute
+    return driver
+
+
+def _timed_execute(original: Callable[..., Any], command: str, params: Optional[Dict[str, Any]]) -> Any:
+    started = time.perf_counter()
+    try:
+        return original(command, params)
+    finally:
+        current = _current_span.get()
+        if current is not None:
+            current.webdriver_calls += 1
+            current.webdriver_time += time.perf_counter() - started
+
+
+def _trim(trace_file: Path) -> None:
+    if trace_file.stat().st_size <= TRACE_MAX_BYTES:
+        return
+    lines = trace_file.read_text(encoding="utf-8").splitlines(keepends=True)
+    temp_path = trace_file.with_suffix(".tmp")
+    temp_path.write_text("".join(lines[len(lines) // 2:]), encoding="utf-8")
+    os.replace(temp_path, trace_file)
+
+
+@contextmanager
+def trace_run(job: str, trace_file: Optional[Path] = None) -> Iterator[TraceRun]:
+    """Collect spans for one run under a root ``run`` span and append them to the log.
+
+    ``trace_file`` defaults to the module-level ``TRACE_FILE`` at call time.
+    """
+    run = TraceRun(job=job)
+    run_token = _current_run.set(run)
+    try:
+        with span("run"):
+            yield run
+    finally:
+        _current_run.reset(run_token)
+        write_run(run, trace_file or TRACE_FILE)
+
+
+def write_run(run: TraceRun, trace_file: Path) -> None:
+    """Append the run's spans to the JSONL log."""
+    trace_file.parent.mkdir(parents=True, exist_ok=True)
+    with run.lock:
+        records = [item.to_record(run) for item in sorted(run.spans, key=lambda item: item.start)]
+    with _write_lock:
+        with trace_file.open("a", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        _trim(trace_file)
+
+
+def load_records(trace_file: Path = TRACE_FILE, last_runs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Read span records, optionally limited to the most recent runs."""
+    if not trace_file.exists():
+        return []
+    records: List[Dict[str, Any]] = []
+    with trace_file.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and "name" in record:
+                records.append(record)
+    if last_runs:
+        run_ids: List[str] = []
+        for record in records:
+            if record.get("run_id") not in run_ids:
+                run_ids.append(record.get("run_id"))
+        keep = set(run_ids[-last_runs:])
+        records = [record for record in records if record.get("run_id") in keep]
+    return records
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Return the linearly interpolated percentile of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(records: Sequence[Dict[str, Any]]) -> str:
+    """Render p50/p95 durations per span name."""
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    for record in records:
+        durations.setdefault(record["name"], []).append(float(record.get("duration", 0.0)))
+        if record.get("status") == "error":
+            errors[record["name"]] = errors.get(record["name"], 0) + 1
+
+    if not durations:
+        return "No trace records found."
+
+    runs = len({record.get("run_id") for record in records})
+    width = max(len(name) for name in durations)
+    lines = [
+        f"{runs} run(s)",
+        f"{'span'.ljust(width)}  {'count':>5}  {'p50':>8}  {'p95':>8}  {'max':>8}  errors",
+    ]
+    for name, values in sorted(durations.items(), key=lambda item: -percentile(item[1], 0.95)):
+        lines.append(
+            f"{name.ljust(width)}  {len(values):5d}  {percentile(values, 0.5):8.2f}  "
+            f"{percentile(values, 0.95):8.2f}  {max(values):8.2f}  {errors.get(name, 0)}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Inspect post_content trace logs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary = subparsers.add_parser("summarize", help="Print p50/p95 per phase across runs.")
+    summary.add_argument("--file", type=Path, default=TRACE_FILE, help="Trace log to read.")
+    summary.add_argument("--last", type=int, help="Only include the most recent N runs.")
+    args = parser.parse_args(argv)
+
+    if args.command == "summarize":
+        print(summarize(load_records(args.file, args.last)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""AES-GCM envelope encryption shared by the cookie file and the browser profile.
+
+Envelopes are JSON objects with base64 fields ``s`` (PBKDF2 salt), ``n``
+(AES-GCM nonce) and ``ct`` (ciphertext). The key is derived from the
+``DECRYPT_KEY`` secret with PBKDF2-HMAC-SHA256. Version 2 envelopes also
+carry ``v`` and ``kdf`` (the KDF name and its parameters), so the iteration
+count can be tuned with ``VAULT_KDF_ITERATIONS`` without breaking stored
+files; an envelope without ``v`` is version 1 with 200,000 iterations.
+
+Derived keys are cached per process, and envelopes written by a process
+reuse the salt of the key it derived last for the same secret, so a daemon
+or batch run pays for one derivation however often it decrypts and
+re-encrypts.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from dotenv import load_dotenv
+
+ENVELOPE_VERSION = 2
+KDF_NAME = "pbkdf2-sha256"
+PBKDF2_ITERATIONS = 200_000
+KDF_ITERATIONS_ENV = "VAULT_KDF_ITERATIONS"
+MIN_PBKDF2_ITERATIONS = 100_000
+SALT_SIZE = 16
+NONCE_SIZE = 12
+
+_key_cache: Dict[Tuple[str, bytes, int], bytes] = {}
+_write_salts: Dict[Tuple[str, int], bytes] = {}
+_cache_lock = threading.Lock()
+
+
+def get_password() -> str:
+    """Return the encryption secret from the environment/.env."""
+    load_dotenv()
+    password = os.getenv("DECRYPT_KEY")
+    if not password:
+        raise RuntimeError("DECRYPT_KEY is missing in environment/.env")
+    return password
+
+
+def kdf_iterations() -> int:
+    """Return the PBKDF2 iteration count for new envelopes."""
+    value = os.getenv(KDF_ITERATIONS_ENV)
+    if not value:
+        return PBKDF2_ITERATIONS
+    try:
+        iterations = int(value)
+    except ValueError as exc:
+        raise RuntimeError(f"{KDF_ITERATIONS_ENV} must be an integer") from exc
+    if iterations < MIN_PBKDF2_ITERATIONS:
+        raise RuntimeError(f"{KDF_ITERATIONS_ENV} must be at least {MIN_PBKDF2_ITERATIONS}")
+    return iterations
+
+
+def derive_key(password: str, salt: bytes, iterations: int = PBKDF2_ITERATIONS) -> bytes:
+    """Derive a 256-bit key from the provided password and salt (cached per process)."""
+    cache_key = (password, salt, iterations)
+    with _cache_lock:
+        key = _key_cache.get(cache_key)
+    if key is not None:
+        return key
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=iterations,
+    )
+    key = kdf.derive(password.encode("utf-8"))
+    with _cache_lock:
+        _key_cache[cache_key] = key
+        _write_salts.setdefault((password, iterations), salt)
+    return key
+
+
+def clear_key_cache() -> None:
+    """Forget every derived key, e.g. after the secret was rotated."""
+    with _cache_lock:
+        _key_cache.clear()
+        _write_salts.clear()
+
+
+def _envelope_kdf(payload: Dict[str, Any]) -> int:
+    """Return the PBKDF2 iteration count an envelope was written with."""
+    version = payload.get("v", 1)
+    if version == 1:
+        return PBKDF2_ITERATIONS
+    if version != ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version: {version!r}")
+    kdf = payload.get("kdf")
+    if not isinstance(kdf, dict) or kdf.get("name") != KDF_NAME:
+        raise ValueError("Encrypted payload uses an unsupported key derivation")
+    iterations = kdf.get("iterations")
+    if not isinstance(iterations, int) or iterations < 1:
+        raise ValueError("Encrypted payload has invalid key derivation parameters")
+    return iterations
+
+
+def encrypt_payload(plaintext: bytes, password: str, iterations: Optional[int] = None) -> Dict[str, Any]:
+    """Encrypt ``plaintext`` into a JSON-serialisable version 2 envelope."""
+    iterations = iterations or kdf_iterations()
+    with _cache_lock:
+        salt = _write_salts.get((password, iterations)) or os.urandom(SALT_SIZE)
+    # The key may be reused; a fresh random nonce per envelope keeps AES-GCM safe.
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = AESGCM(derive_key(password, salt, iterations)).encrypt(nonce, plaintext, None)
+    return {
+        "v": ENVELOPE_VERSION,
+        "kdf": {"name": KDF_NAME, "iterations": iterations},
+        "s": base64.b64encode(salt).decode("ascii"),
+        "n": base64.b64encode(nonce).decode("ascii"),
+        "ct": base64.b64encode(ciphertext).decode("ascii"),
+    }
+
+
+def decrypt_payload(payload: Dict[str, Any], password: str) -> bytes:
+    """Decrypt the AES-GCM payload using the provided password."""
+    try:
+        salt = base64.b64decode(payload["s"])
+        nonce = base64.b64decode(payload["n"])
+        ciphertext = base64.b64decode(payload["ct"])
+    except KeyError as exc:
+        raise ValueError("Encrypted payload is missing required fields") from exc
+
+    key = derive_key(password, salt, _envelope_kdf(payload))
+    aesgcm = AESGCM(key)
+    return aesgcm.decrypt(nonce, ciphertext, None)
+
+
+def write_envelope(path: Path, plaintext: bytes, password: str) -> None:
+    """Encrypt ``plaintext`` and replace ``path`` with the envelope atomically."""
+    payload = encrypt_payload(plaintext, password)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with temp_path.open("w", encoding="utf-8") as handle:
+        json.dump(payload, handle)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)